@@ -0,0 +1,181 @@
+# almacen_unificado.py
+# Une los CSV del diccionario (los tres esquemas) en un solo archivo SQLite normalizado.
+# Uso:
+#   python almacen_unificado.py construir diccionario.db diccionario_utf8.csv diccionario_shi_es.csv diccionario_es_shi.csv [es_shi_estructurado.csv]
+#   python almacen_unificado.py ver diccionario.db "a'cha"
+#
+# Esquemas de entrada (se detectan por la cabecera):
+#   headword,entry_text,page[,mode]                        crudo (extraer_diccionario*.py); mode "es" = ES→SHI
+#   headword,pos,gloss_es,examples_shi,examples_es,page    limpio (limpiar_entradas_v2.py), SHI→ES
+#   es_head,shi_lemma,pos,def_es,examples_shi,examples_es,page   estructurado (extraer_es_shi.py), ES→SHI
+#
+# Tablas:
+#   pos(id, etiqueta)  fuentes(id, nombre)          etiquetas y archivos internados
+#   entradas(id, dir, lema, clave, pos, fuente, fila, page, texto, ejemplos_shi, ejemplos_es)
+#   enlaces(shi, es)                                 entrada SHI→ES ↔ entrada ES→SHI del mismo lema shiwilu
+# `registro(lema)` devuelve con una sola consulta las entradas de ambos sentidos ya enlazadas.
+
+import sys, re, csv, json, sqlite3, time
+from pathlib import Path
+from comun import norm
+
+POS_RE = re.compile(r"(?:^|\s)(vb|vt|vi|adj|adv|nom|prt|s|interj|interrog|post|adpos|conect|conj)\.(?=\s|$)")
+# en una entrada ES→SHI cruda, el lema shiwilu es la palabra justo antes de la primera etiqueta
+LEMA_SHI_RE = re.compile(r"(?:^|\s)\*?([^\s()]+)\s+(?:\([^()]*\)\s+)?(?:vb|vt|vi|adj|adv|nom|prt|s|interj|interrog|post|adpos|conect|conj)\.(?=\s|$)")
+
+ESQUEMA = """
+CREATE TABLE pos (id INTEGER PRIMARY KEY, etiqueta TEXT UNIQUE NOT NULL);
+CREATE TABLE fuentes (id INTEGER PRIMARY KEY, nombre TEXT UNIQUE NOT NULL);
+CREATE TABLE entradas (
+    id INTEGER PRIMARY KEY,
+    dir TEXT NOT NULL CHECK (dir IN ('shi', 'es')),
+    lema TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    pos INTEGER REFERENCES pos(id),
+    fuente INTEGER NOT NULL REFERENCES fuentes(id),
+    fila INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    texto TEXT NOT NULL,
+    ejemplos_shi TEXT NOT NULL DEFAULT '',
+    ejemplos_es TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE enlaces (shi INTEGER NOT NULL REFERENCES entradas(id),
+                      es INTEGER NOT NULL REFERENCES entradas(id),
+                      PRIMARY KEY (shi, es)) WITHOUT ROWID;
+"""
+INDICES = """
+CREATE INDEX entradas_clave ON entradas(clave);
+CREATE INDEX enlaces_es ON enlaces(es);
+"""
+
+def clave(s: str) -> str:
+    """Clave de búsqueda del lema: minúscula, sin asterisco ni número de homónimo (a'uker'1 → a'uker')."""
+    return re.sub(r"\d+$", "", norm(s).lower().lstrip("*¡¿").rstrip(".,;:)"))
+
+def entero(s) -> int:
+    s = str(s or "").strip()
+    return int(s) if s.isdigit() else 0
+
+def pos_de(texto: str) -> str:
+    m = POS_RE.search(texto)
+    return m.group(1) + "." if m else ""
+
+def filas_unificadas(ruta: Path):
+    """(dir, lema, pos, page, texto, ejemplos_shi, ejemplos_es, lema_shi) por fila, según el esquema del CSV."""
+    with ruta.open("r", encoding="utf-8", newline="") as f:
+        rdr = csv.DictReader(f)
+        cols = set(rdr.fieldnames or [])
+        for row in rdr:
+            g = lambda c: norm(row.get(c))
+            if "es_head" in cols:
+                yield ("es", g("es_head"), g("pos"), entero(row.get("page")), g("def_es"),
+                       g("examples_shi"), g("examples_es"), g("shi_lemma"))
+            elif "gloss_es" in cols:
+                yield ("shi", g("headword"), g("pos"), entero(row.get("page")), g("gloss_es"),
+                       g("examples_shi"), g("examples_es"), g("headword"))
+            elif "entry_text" in cols:
+                texto = g("entry_text")
+                if g("mode") == "es":
+                    m = LEMA_SHI_RE.search(texto)
+                    yield ("es", g("headword"), pos_de(texto), entero(row.get("page")), texto, "", "",
+                           m.group(1) if m else "")
+                else:
+                    yield ("shi", g("headword"), pos_de(texto), entero(row.get("page")), texto, "", "",
+                           g("headword"))
+            else:
+                raise KeyError(f"Esquema desconocido: {ruta} ({', '.join(sorted(cols))})")
+
+def construir(rutas, destino):
+    destino = Path(destino)
+    tmp = destino.with_name(destino.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    con = sqlite3.connect(tmp)
+    con.executescript(ESQUEMA)
+    pos_ids, shi_por_clave, es_lema_shi = {}, {}, []
+    filas = []
+    for k, ruta in enumerate(rutas):
+        ruta = Path(ruta)
+        con.execute("INSERT INTO fuentes VALUES (?, ?)", (k, ruta.stem))
+        for fila, (d, lema, pos, page, texto, ej_shi, ej_es, lema_shi) in enumerate(filas_unificadas(ruta)):
+            if not lema: continue
+            p = None
+            if pos:
+                p = pos_ids.setdefault(pos, len(pos_ids))
+            i = len(filas) + 1
+            filas.append((i, d, lema, clave(lema), p, k, fila, page, texto, ej_shi, ej_es))
+            if d == "shi":
+                shi_por_clave.setdefault(clave(lema), []).append(i)
+            elif lema_shi:
+                es_lema_shi.append((i, clave(lema_shi)))
+    con.executemany("INSERT INTO pos VALUES (?, ?)", ((i, t) for t, i in pos_ids.items()))
+    con.executemany("INSERT INTO entradas VALUES (?,?,?,?,?,?,?,?,?,?,?)", filas)
+    enlaces = sorted({(s, e) for e, c in es_lema_shi for s in shi_por_clave.get(c, ())})
+    con.executemany("INSERT INTO enlaces VALUES (?, ?)", enlaces)
+    con.executescript(INDICES)
+    con.commit()
+    con.execute("VACUUM")
+    con.close()
+    tmp.replace(destino)
+    return len(filas), len(enlaces), len(pos_ids)
+
+class Almacen:
+    def __init__(self, ruta):
+        self.con = sqlite3.connect(f"file:{Path(ruta)}?mode=ro", uri=True, check_same_thread=False)
+        self.con.row_factory = sqlite3.Row
+
+    def cerrar(self):
+        self.con.close()
+
+    CAMPOS = ("SELECT e.id, e.dir, e.lema, p.etiqueta AS pos, f.nombre AS fuente, e.fila, e.page, "
+              "e.texto, e.ejemplos_shi, e.ejemplos_es FROM entradas e "
+              "LEFT JOIN pos p ON p.id = e.pos JOIN fuentes f ON f.id = e.fuente")
+
+    def entrada(self, i: int):
+        r = self.con.execute(f"{self.CAMPOS} WHERE e.id = ?", (i,)).fetchone()
+        return dict(r) if r else None
+
+    def registro(self, lema: str):
+        """
+        Entradas (de ambos sentidos) cuyo lema coincide, cada una con las del otro sentido enlazadas.
+        Una entrada ES→SHI cuyo lema shiwilu coincide también cuenta: así "a'cha" trae sus glosas en español.
+        """
+        c = clave(lema)
+        filas = self.con.execute(f"""
+            WITH base AS (SELECT id FROM entradas WHERE clave = ?),
+            todo AS (SELECT id FROM base
+                     UNION SELECT l.es FROM enlaces l JOIN base b ON l.shi = b.id
+                     UNION SELECT l.shi FROM enlaces l JOIN base b ON l.es = b.id)
+            {self.CAMPOS} WHERE e.id IN (SELECT id FROM todo) ORDER BY e.dir DESC, e.id""", (c,)).fetchall()
+        ids = [r["id"] for r in filas]
+        enl, dentro = {}, set(ids)
+        if ids:
+            marcas = ",".join("?" * len(ids))
+            for s, e in self.con.execute(f"SELECT shi, es FROM enlaces WHERE shi IN ({marcas})", ids):
+                if e in dentro:   # solo enlaces entre entradas devueltas
+                    enl.setdefault(s, []).append(e); enl.setdefault(e, []).append(s)
+        res = {"lema": norm(lema), "shi": [], "es": []}
+        for r in filas:
+            d = dict(r); d["enlaces"] = sorted(enl.get(r["id"], []))
+            res[r["dir"]].append(d)
+        return res
+
+def main():
+    if len(sys.argv) < 4 or sys.argv[1] not in ("construir", "ver"):
+        print('Uso: python almacen_unificado.py construir diccionario.db A.csv [B.csv ...]')
+        print('     python almacen_unificado.py ver diccionario.db "lema"')
+        sys.exit(1)
+    ruta = Path(sys.argv[2])
+    if sys.argv[1] == "construir":
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        n, n_enl, n_pos = construir(sys.argv[3:], ruta)
+        print(f"OK: {n} entradas, {n_enl} enlaces SHI↔ES, {n_pos} etiquetas POS → {ruta} ({ruta.stat().st_size} bytes)")
+        return
+    alm = Almacen(ruta)
+    t0 = time.perf_counter()
+    res = alm.registro(sys.argv[3])
+    dt = (time.perf_counter() - t0) * 1000
+    print(json.dumps(res, ensure_ascii=False, indent=1))
+    print(f"{len(res['shi'])} SHI→ES, {len(res['es'])} ES→SHI en {dt:.3f} ms")
+
+if __name__ == "__main__":
+    main()
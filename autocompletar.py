@@ -0,0 +1,154 @@
+# autocompletar.py
+# Autocompletado por prefijo con top-k precalculado (arreglo ordenado + bisección).
+# Uso:
+#   python autocompletar.py construir autocompletar.tbl diccionario_shi_es.csv es_shi_estructurado.csv
+#   python autocompletar.py sugerir autocompletar.tbl "a'chi" [--k 10]
+#
+# Cada CSV aporta su columna headword (SHI→ES) o es_head (salida de extraer_es_shi.py).
+# El puntaje de una palabra = 100·sentidos + ejemplos (sumado sobre sus filas).
+# Se guardan dos tablas mmap (ver tabla_mmap.py):
+#   destino           clave | texto | fuente | puntaje        (ordenada por clave)
+#   destino.prefijos  prefijo | ids del top-k                  (solo prefijos con muchos candidatos)
+# Un prefijo con más de UMBRAL palabras responde desde su top-k guardado; uno con menos,
+# recorriendo su rango (≤ UMBRAL filas). Nunca se recorre un subárbol grande.
+
+import sys, re, time, heapq
+from pathlib import Path
+from tabla_mmap import TablaMmap, escribir_tabla
+from comun import norm
+from limpiar_entradas_v2 import open_csv_any
+
+UMBRAL = 64
+K_MAX = 20
+SENTIDO_RE = re.compile(r"(?:^|\s)\d\)")
+ORACION_RE = re.compile(r"(?<=[\.\!\?])\s+")
+
+def clave(s: str) -> str:
+    return norm(s).lower().lstrip("¡¿*\"“ ")
+
+def oraciones(s: str) -> int:
+    return len([x for x in ORACION_RE.split(norm(s)) if x])
+
+def puntaje(row) -> int:
+    """100·sentidos numerados (mín. 1) + nº de oraciones de ejemplo."""
+    texto = row.get("entry_text") or row.get("def_es") or ""
+    sentidos = max(1, len(SENTIDO_RE.findall(texto)))
+    if "examples_shi" in row:
+        ejemplos = oraciones(row["examples_shi"] or "") + oraciones(row.get("examples_es") or "")
+    else:
+        # CSV crudo (headword, entry_text): las oraciones tras la definición son ejemplos
+        ejemplos = max(0, oraciones(texto) - 1)
+    return 100 * sentidos + ejemplos
+
+def ruta_prefijos(ruta) -> Path:
+    return Path(ruta).with_suffix(".prefijos")
+
+def construir(rutas, destino):
+    items = {}   # (clave, fuente) → [texto, puntaje]
+    for ruta in rutas:
+        ruta = Path(ruta)
+        f, rdr, _ = open_csv_any(ruta)
+        with f:
+            col = "es_head" if "es_head" in (rdr.fieldnames or []) else "headword"
+            for row in rdr:
+                texto = norm(row[col]); c = clave(texto)
+                if not c: continue
+                it = items.setdefault((c, ruta.stem), [texto, 0])
+                it[1] += puntaje(row)
+
+    orden = sorted(items.items())
+    claves = [c for (c, _), _ in orden]
+    puntos = [p for _, (_, p) in orden]
+
+    # top-k de cada prefijo con más de UMBRAL palabras (recorrido en profundidad del "trie" implícito)
+    prefijos = []
+    def visitar(p: str, lo: int, hi: int):
+        if hi - lo <= UMBRAL: return
+        top = heapq.nlargest(K_MAX, range(lo, hi), key=lambda i: (puntos[i], -i))
+        prefijos.append((p, ",".join(map(str, top))))
+        i, n = lo, len(p)
+        while i < hi:
+            if len(claves[i]) <= n: i += 1; continue
+            hijo = claves[i][:n+1]
+            j = bisect_fin(claves, hijo, i, hi)
+            visitar(hijo, i, j)
+            i = j
+    visitar("", 0, len(claves))
+
+    escribir_tabla(destino, ("clave", "texto", "fuente", "puntaje"),
+                   ((c, t, fuente, p) for (c, fuente), (t, p) in orden))
+    escribir_tabla(ruta_prefijos(destino), ("prefijo", "top"), prefijos)
+    return len(orden), len(prefijos)
+
+def bisect_fin(claves, p: str, lo: int, hi: int) -> int:
+    """Primer índice en [lo, hi) cuya clave ya no empieza por p (las claves están ordenadas)."""
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if claves[mid][:len(p)] <= p: lo = mid + 1
+        else: hi = mid
+    return lo
+
+class Autocompletar:
+    """Se abre con mmap; en memoria solo queda el diccionario de prefijos grandes."""
+    def __init__(self, ruta):
+        self.tabla = TablaMmap(ruta)
+        with TablaMmap(ruta_prefijos(ruta)) as t:
+            self.top = {t.celda(i, 0): [int(x) for x in t.celda(i, 1).split(",")] for i in range(len(t))}
+
+    def cerrar(self):
+        self.tabla.cerrar()
+
+    def _clave(self, i: int) -> str:
+        return self.tabla.celda(i, 0)
+
+    def _rango(self, p: str):
+        n, t = len(p), self.tabla
+        lo, hi = 0, len(t)
+        while lo < hi:                     # primer índice con clave ≥ p
+            mid = (lo + hi) // 2
+            if self._clave(mid) < p: lo = mid + 1
+            else: hi = mid
+        ini, hi = lo, len(t)
+        while lo < hi:                     # primer índice cuya clave ya no empieza por p
+            mid = (lo + hi) // 2
+            if self._clave(mid)[:n] <= p: lo = mid + 1
+            else: hi = mid
+        return ini, lo
+
+    def item(self, i: int):
+        t = self.tabla
+        return (t.celda(i, 1), t.celda(i, 2), int(t.celda(i, 3)))
+
+    def sugerir(self, prefijo: str, k: int = 10):
+        """Top-k (texto, fuente, puntaje) cuyas claves empiezan por el prefijo (k ≤ K_MAX)."""
+        p = clave(prefijo)
+        ids = self.top.get(p)
+        if ids is None:
+            lo, hi = self._rango(p)
+            if hi - lo > UMBRAL:   # no debería pasar: todo prefijo grande tiene top guardado
+                hi = lo + UMBRAL
+            ids = heapq.nlargest(k, range(lo, hi), key=lambda i: (int(self.tabla.celda(i, 3)), -i))
+        return [self.item(i) for i in ids[:k]]
+
+def main():
+    if len(sys.argv) < 4 or sys.argv[1] not in ("construir", "sugerir"):
+        print('Uso: python autocompletar.py construir autocompletar.tbl A.csv [B.csv ...]')
+        print('     python autocompletar.py sugerir autocompletar.tbl "prefijo" [--k 10]')
+        sys.exit(1)
+    ruta = Path(sys.argv[2])
+    if sys.argv[1] == "construir":
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        n, n_pref = construir(sys.argv[3:], ruta)
+        print(f"OK: {n} palabras, {n_pref} prefijos con top-{K_MAX} → {ruta}")
+        return
+    k = int(sys.argv[sys.argv.index("--k") + 1]) if "--k" in sys.argv else 10
+    ac = Autocompletar(ruta)
+    t0 = time.perf_counter()
+    res = ac.sugerir(sys.argv[3], k)
+    dt = (time.perf_counter() - t0) * 1000
+    for texto, fuente, p in res:
+        print(f"{p}\t{fuente}\t{texto}")
+    print(f"{len(res)} sugerencias en {dt:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# bench_ensamblado.py
+# Costo por página al ensamblar una entrada muy larga (sin cabeceras nuevas), antes y después
+# de acumular fragmentos. Con la concatenación + norm() por línea el costo crece con el largo
+# acumulado (O(n²)); con fragmentos debe quedar plano.
+# Uso: python bench_ensamblado.py [PAGINAS] [LINEAS_POR_PAGINA]
+
+import sys, time
+import extraer_es_shi as es_shi
+import extraer_diccionario_dual as dual
+
+LINEA = "Kusinawek misa' piperwanakla a'nu'tulek, la mesa de mi cocina."
+
+def paginas_sinteticas(n_lineas: int):
+    """Primera página con una cabecera; el resto, solo continuación de la misma entrada."""
+    def lineas_de(i):
+        cuerpo = [LINEA] * n_lineas
+        return (["wanan", "wanan s. especie de árbol"] + cuerpo) if i == 0 else cuerpo
+    return lineas_de
+
+def antes_es_shi(lineas_de, n_pag):
+    """Bucle original (clasificación + cur["rest"] = norm(cur["rest"] + " " + ln))."""
+    cur, tiempos = {"rest": ""}, []
+    for i in range(n_pag):
+        t0 = time.perf_counter()
+        for ln in lineas_de(i):
+            if es_shi.is_trash(ln) or es_shi.HDR_SECOND.match(ln):
+                continue
+            cur["rest"] = es_shi.norm(cur["rest"] + " " + ln)
+        tiempos.append(time.perf_counter() - t0)
+    return tiempos
+
+def antes_dual(lineas_de, n_pag):
+    """Bucle original (clasificación + cur["entry_text"] += " " + ln)."""
+    cur, tiempos = {"entry_text": ""}, []
+    for i in range(n_pag):
+        t0 = time.perf_counter()
+        for ln in lineas_de(i):
+            if dual.is_header_line(ln, "shi"):
+                continue
+            if cur["entry_text"].endswith("-"):
+                cur["entry_text"] = cur["entry_text"][:-1] + ln
+            else:
+                cur["entry_text"] += " " + ln
+        tiempos.append(time.perf_counter() - t0)
+    return tiempos
+
+def cronometrar_paginas(lineas_de, n_pag, consumir):
+    """Mide el tiempo que pasa dentro de lineas_de(i) + el procesamiento de cada página."""
+    tiempos, marca = [], [None]
+    def medido(i):
+        ahora = time.perf_counter()
+        if marca[0] is not None: tiempos.append(ahora - marca[0])
+        marca[0] = ahora
+        return lineas_de(i)
+    consumir(medido)
+    tiempos.append(time.perf_counter() - marca[0])   # última página + cierre de la entrada
+    return tiempos
+
+def despues_es_shi(lineas_de, n_pag):
+    stats = {"encabezados": 0, "filas": 0}
+    return cronometrar_paginas(lineas_de, n_pag, lambda f: list(es_shi.leer_entradas(f, 0, n_pag, stats)))
+
+def despues_dual(lineas_de, n_pag):
+    return cronometrar_paginas(lineas_de, n_pag,
+                               lambda f: dual.cerrar_entradas(dual.segmentar_paginas(f, 0, n_pag - 1, "shi")[1]))
+
+def resumen(nombre, tiempos):
+    q = max(1, len(tiempos) // 4)
+    ini = sum(tiempos[1:q+1]) / q * 1000
+    fin = sum(tiempos[-q-1:-1]) / q * 1000
+    print(f"{nombre:<22} primer cuarto {ini:8.3f} ms/pág | último cuarto {fin:8.3f} ms/pág | x{fin/ini:5.1f}")
+
+def main():
+    n_pag = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    n_lin = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    lineas_de = paginas_sinteticas(n_lin)
+    largo = n_pag * n_lin * (len(LINEA) + 1)
+    print(f"Entrada única de {n_pag} páginas × {n_lin} líneas (~{largo/1024:.0f} KB)")
+    resumen("es_shi antes", antes_es_shi(lineas_de, n_pag))
+    resumen("es_shi después", despues_es_shi(lineas_de, n_pag))
+    resumen("dual antes", antes_dual(lineas_de, n_pag))
+    resumen("dual después", despues_dual(lineas_de, n_pag))
+
+if __name__ == "__main__":
+    main()
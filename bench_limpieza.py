@@ -0,0 +1,89 @@
+# bench_limpieza.py
+# Filas/segundo de process_row() con el clasificador de una sola pasada vs. la versión anterior
+# (is_spanish/is_shiwilu/clean_noise con regex sin compilar, recalculados por unidad, y un
+# regex compilado por fila en strip_headword_echo).
+# Uso: python bench_limpieza.py [diccionario_utf8.csv] [REPETICIONES]
+
+import sys, re, time
+from pathlib import Path
+import limpiar_entradas_v2 as L
+
+# --- referencia: clasificación tal como estaba antes ---
+
+def clean_noise_antes(s: str) -> str:
+    s = L.NOISE_PAT.sub("", s)
+    s = re.sub(r"\(\s*\)", "", s)
+    s = re.sub(r"\s{2,}", " ", s).strip(" ,;:")
+    return s
+
+def is_spanish_antes(s: str) -> bool:
+    if re.search(r"[áéíóúñÁÉÍÓÚÑ¿¡]", s):
+        return True
+    if re.search(L.SPAN_COMMON, s, re.I):
+        return True
+    if re.search(r"\d", s) and s.count("'") < 2:
+        return True
+    return False
+
+def is_shiwilu_antes(s: str) -> bool:
+    return (s.count("'") >= 2) and ("¿" not in s and "¡" not in s)
+
+def clasificar_antes(u: str) -> str:
+    if is_shiwilu_antes(u) and not is_spanish_antes(u):
+        return "shi"
+    elif is_spanish_antes(u):
+        return "es"
+    return "shi" if u.count("'") >= 2 else "es"
+
+def strip_headword_echo_antes(text: str, head: str) -> str:
+    t = re.sub(rf"^{re.escape(head)}\b[\s\d\W]*", "", text, flags=re.I)
+    return L.norm(t)
+
+class version_anterior:
+    """Sustituye temporalmente las funciones del módulo por las de referencia."""
+    NOMBRES = {"clean_noise": clean_noise_antes, "is_spanish": is_spanish_antes,
+               "is_shiwilu": is_shiwilu_antes, "clasificar": clasificar_antes,
+               "strip_headword_echo": strip_headword_echo_antes}
+
+    def __enter__(self):
+        self.orig = {k: getattr(L, k) for k in self.NOMBRES}
+        for k, v in self.NOMBRES.items(): setattr(L, k, v)
+
+    def __exit__(self, *exc):
+        for k, v in self.orig.items(): setattr(L, k, v)
+
+def limpiar_caches():
+    for fn in (L.rasgos, L.clean_noise):
+        if hasattr(fn, "cache_clear"): fn.cache_clear()
+
+def cronometrar(rows, cols, reps: int):
+    mejor, salida = None, None
+    for _ in range(reps):
+        limpiar_caches()   # cada repetición parte en frío
+        t0 = time.perf_counter()
+        salida = [L.process_row(r, cols) for r in rows]
+        dt = time.perf_counter() - t0
+        mejor = dt if mejor is None else min(mejor, dt)
+    return len(rows) / mejor, salida
+
+def main():
+    inp = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("diccionario_utf8.csv")
+    reps = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    f, rdr, hdrs = L.open_csv_any(inp)
+    with f:
+        cols = L.expect_cols(hdrs)
+        rows = list(rdr)
+
+    with version_anterior():
+        antes, ref = cronometrar(rows, cols, reps)
+    despues, nueva = cronometrar(rows, cols, reps)
+
+    if ref != nueva:
+        print("ERROR: la salida difiere de la versión anterior")
+        sys.exit(1)
+    print(f"{inp.name}: {len(rows)} filas (mejor de {reps})")
+    print(f"  antes   {antes:10.0f} filas/s")
+    print(f"  después {despues:10.0f} filas/s   (x{despues/antes:.2f}, salida idéntica)")
+
+if __name__ == "__main__":
+    main()
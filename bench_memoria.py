@@ -0,0 +1,116 @@
+# bench_memoria.py
+# Memoria por entrada: dicts de antes vs. modelo_entradas.py (dataclasses con __slots__,
+# POS internadas, página int).
+# Uso:
+#   python bench_memoria.py [diccionario_utf8.csv] [diccionario_es_shi.csv] [--copias 10]
+#
+# Los textos (headword, entry_text, glosas...) son los mismos objetos en las dos variantes: se
+# leen y procesan antes de medir, así lo medido es lo que agrega cada representación (contenedor,
+# POS y página). Las POS del dict son cadenas nuevas por fila, como las que daba el regex; la
+# página del dict de limpiar_entradas_v2.py es el texto del CSV. Formas:
+#   Entrada        como las de segment_pdf() (headword, entry_text, page, page_end)
+#   FilaEsShi      7 campos de extraer_es_shi.estructurar(), armadas desde las filas ES→SHI
+#                  (lema = extract_headword, POS = TAG_RE, definición/ejemplos = split_examples)
+#   FilaLimpia     salida de process_row()
+# --copias repite las filas para tener un volumen parecido al diccionario completo.
+
+import sys, gc, time, csv, tracemalloc
+from pathlib import Path
+import extraer_diccionario_dual as dual
+import extraer_es_shi as es_shi
+import limpiar_entradas_v2 as limpiar
+from modelo_entradas import Entrada, FilaEsShi, FilaLimpia, pos_interna, pagina
+from comun import arg
+
+def nueva(s: str) -> str:
+    """Copia de la cadena en un objeto distinto (como las que crea cada match del regex)."""
+    return s.encode("utf-8").decode("utf-8")
+
+def leer(ruta):
+    with open(ruta, "r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+def medir(fabricar, datos):
+    """(bytes que quedan asignados, µs por entrada) de construir la lista; la memoria, en una corrida aparte."""
+    gc.collect()
+    t0 = time.perf_counter()
+    lista = [fabricar(*d) for d in datos]
+    dt = time.perf_counter() - t0
+    del lista
+    gc.collect()
+    tracemalloc.start()
+    lista = [fabricar(*d) for d in datos]
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del lista
+    return actual, dt / max(1, len(datos)) * 1e6
+
+# --- datos de entrada (fuera de la medición) ---
+
+def datos_entrada(filas):
+    return [(r["headword"], r["entry_text"], int(r["page"])) for r in filas]
+
+def datos_es_shi(filas):
+    res = []
+    for r in filas:
+        m = dual.TAG_RE.search(r["entry_text"])
+        def_es, ex_shi, ex_es = es_shi.split_examples(r["entry_text"])
+        res.append((r["headword"], dual.extract_headword(r["entry_text"]), m.group(0) if m else "",
+                    def_es, ex_shi, ex_es, int(r["page"])))
+    return res
+
+def datos_limpia(filas, cols):
+    res = []
+    for r in filas:
+        c, _, _ = limpiar.process_row(r, cols)
+        res.append((c.headword, c.pos, c.gloss_es, c.examples_shi, c.examples_es, str(c.page)))
+    return res
+
+# --- las dos representaciones ---
+
+FORMAS = {
+    "Entrada": (
+        lambda h, t, p: {"headword": h, "entry_text": t, "page": p, "page_end": p},
+        lambda h, t, p: Entrada(h, p, p, entry_text=t)),
+    "FilaEsShi": (
+        lambda es, shi, pos, d, xs, xe, p: dict(es_head=es, shi_lemma=shi, pos=nueva(pos), def_es=d,
+                                                examples_shi=xs, examples_es=xe, page=p),
+        lambda es, shi, pos, d, xs, xe, p: FilaEsShi(es, shi, pos_interna(nueva(pos)), d, xs, xe, p)),
+    "FilaLimpia": (
+        lambda h, pos, g, xs, xe, p: {"headword": h, "pos": nueva(pos), "gloss_es": g,
+                                      "examples_shi": xs, "examples_es": xe, "page": nueva(p)},
+        lambda h, pos, g, xs, xe, p: FilaLimpia(h, pos_interna(nueva(pos)), g, xs, xe, pagina(nueva(p)))),
+}
+
+def main():
+    args = [a for i, a in enumerate(sys.argv[1:], 1) if not a.startswith("--") and sys.argv[i - 1] != "--copias"]
+    crudo = Path(args[0] if args else "diccionario_utf8.csv")
+    es = Path(args[1] if len(args) > 1 else "diccionario_es_shi.csv")
+    copias = int(arg("--copias", "10"))
+
+    filas_crudo, filas_es = leer(crudo), leer(es)
+    f, rdr, hdrs = limpiar.open_csv_any(crudo)
+    with f:
+        cols = limpiar.expect_cols(hdrs)
+        filas_limpiar = list(rdr)
+    datos = {
+        "Entrada": datos_entrada(filas_crudo) * copias,
+        "FilaEsShi": datos_es_shi(filas_es) * copias,
+        "FilaLimpia": datos_limpia(filas_limpiar, cols) * copias,
+    }
+
+    print(f"{crudo.name} + {es.name}, x{copias} copias (sin contar los textos compartidos)")
+    print(f"  {'forma':<11} {'entradas':>9} {'dict':>13} {'slots':>13} {'ahorro':>7}   µs/entrada dict → slots")
+    for nombre, (como_dict, como_slots) in FORMAS.items():
+        d = datos[nombre]
+        m_dict, t_dict = medir(como_dict, d)
+        m_slots, t_slots = medir(como_slots, d)
+        # los objetos deben llevar lo mismo (página como int en ambos lados)
+        assert all(como_slots(*x).a_dict() == {**como_dict(*x), "page": pagina(como_dict(*x)["page"])}
+                   for x in d[:200] if nombre != "Entrada")
+        n = len(d) or 1
+        print(f"  {nombre:<11} {len(d):9d} {m_dict/n:9.1f} B/e {m_slots/n:9.1f} B/e {1 - m_slots/max(1, m_dict):6.1%}"
+              f"   {t_dict:.2f} → {t_slots:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# benchmark.py
+# Banco de pruebas de rendimiento de las etapas calientes, con entradas fijas.
+# Uso:
+#   python benchmark.py [--paginas 40] [--reps 3] [--salida bench_output.txt]
+#
+# El PDF del diccionario no se distribuye: se genera uno sintético a dos columnas con PyMuPDF
+# a partir de diccionario_shi_es.csv (muestra fija, semilla 0). La primera mitad de las páginas
+# tiene entradas SHI→ES (cabecera "lema pos. ..."), la segunda ES→SHI (línea en español +
+# "lema pos. ..."), así segment_pdf y extraer_es_shi encuentran lo que esperan.
+#
+# Por etapa: unidades/s (mejor de --reps), pico de memoria asignada (tracemalloc, en una
+# corrida aparte para no distorsionar el tiempo) y RSS máximo del proceso hasta ese punto.
+# Cada corrida se agrega a la salida como un bloque "## fecha commit" y se compara con el anterior.
+
+import sys, io, re, csv, time, random, resource, textwrap, tempfile, subprocess, tracemalloc
+from contextlib import redirect_stdout, contextmanager, ExitStack
+from datetime import datetime
+from pathlib import Path
+
+import fitz
+import extraer_diccionario_dual as dual
+import extraer_es_shi as es_shi
+import limpiar_entradas_v2 as limpiar
+from modelo_entradas import FilaLimpia
+from comun import arg
+
+ANCHO, ALTO = 595, 842           # A4 en puntos
+MARGEN, INTERLINEA, CUERPO = 40, 11, 8.5
+FILAS_CSV = Path("diccionario_shi_es.csv")
+LIMPIAR_CSV = Path("diccionario_utf8.csv")
+N_CONSULTAS = 500
+
+# --- PDF sintético ---
+
+def entradas_muestra(n: int):
+    with FILAS_CSV.open("r", encoding="utf-8", newline="") as f:
+        filas = [r for r in csv.DictReader(f) if dual.TAG_RE.search(r["entry_text"])]
+    return random.Random(0).sample(filas, min(n, len(filas)))
+
+def lineas_shi(row):
+    return textwrap.wrap(row["entry_text"], 48)
+
+def lineas_es(row):
+    """
+    Línea en español (lo que sigue a la etiqueta) + 'lema pos.resto', como en la parte ES→SHI.
+    Sin espacio tras la etiqueta: HDR_SECOND de extraer_es_shi.py pide \\b después del punto.
+    """
+    txt = row["entry_text"]
+    m = dual.TAG_RE.search(txt)
+    glosa = re.split(r"[.,;(]", txt[m.end():].strip(" ."), 1)[0].strip() or "palabra"
+    resto = f"{row['headword'].lstrip('*')} {m.group(1).lower()}.{txt[m.end():].strip(' .')}."
+    return [glosa[:40]] + textwrap.wrap(resto, 48)
+
+def pdf_sintetico(ruta: Path, paginas: int):
+    """Dos columnas por página; devuelve (páginas SHI, páginas ES)."""
+    filas = entradas_muestra(paginas * 12)
+    doc = fitz.open()
+    mitad, k = paginas // 2, 0
+    col_x = (MARGEN, ANCHO / 2 + 10)
+    por_col = int((ALTO - 2 * MARGEN) // INTERLINEA)
+    for p in range(paginas):
+        page = doc.new_page(width=ANCHO, height=ALTO)
+        page.insert_text((ANCHO / 2 - 30, MARGEN - 15), "Diccionario shiwilu", fontsize=CUERPO)
+        for x in col_x:
+            y, usadas = MARGEN, 0
+            while k < len(filas):
+                lineas = (lineas_shi if p < mitad else lineas_es)(filas[k])
+                if usadas + len(lineas) + 1 > por_col: break
+                for ln in lineas:
+                    page.insert_text((x, y), ln, fontsize=CUERPO); y += INTERLINEA
+                y += INTERLINEA; usadas += len(lineas) + 1; k += 1
+            if k >= len(filas): k = 0
+    doc.save(str(ruta))
+    doc.close()
+    return (1, mitad), (mitad + 1, paginas)
+
+# --- medición ---
+
+def medir(fn, reps: int):
+    """(mejor tiempo, unidades, pico tracemalloc en bytes)."""
+    mejor, n = None, 0
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            n = fn()
+        dt = time.perf_counter() - t0
+        mejor = dt if mejor is None else min(mejor, dt)
+    tracemalloc.start()
+    with redirect_stdout(io.StringIO()):
+        fn()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return mejor, n, pico
+
+def rss_max_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # Linux: KiB
+
+@contextmanager
+def etapas(pdf: Path, shi, es, tmp: Path):
+    """[(nombre, unidad, función que devuelve nº de unidades)] en orden fijo; al salir cierra el PDF y los índices."""
+    with ExitStack() as pila:
+        yield _etapas(pdf, shi, es, tmp, pila)
+
+def _etapas(pdf: Path, shi, es, tmp: Path, pila: ExitStack):
+    from indice_invertido import IndiceInvertido, construir as construir_indice
+    from busqueda_difusa import IndiceDifuso
+    from autocompletar import Autocompletar, construir as construir_ac
+    from bm25 import BM25, construir as construir_bm25
+    from motor_fts5 import MotorFTS5, cargar as cargar_fts5
+
+    doc = fitz.open(str(pdf)); pila.callback(doc.close)
+    def orden_lectura():
+        return sum(1 for i in range(len(doc)) for _ in dual.lines_in_reading_order(doc[i])) and len(doc)
+
+    def segment_pdf():
+        filas, _, _ = dual.segment_pdf(pdf, shi[0], shi[1], "shi")
+        return len(filas)
+
+    def es_shi_run():
+        return sum(1 for _ in es_shi.run(pdf, es[0] - 1, es[1]))
+
+    stats = {"encabezados": 0, "filas": 0}
+    restos = [e.rest for e in es_shi.leer_entradas(lambda i: dual.lines_in_reading_order(doc[i]),
+                                                     es[0] - 1, es[1], stats)]
+    def split_examples():
+        for r in restos: es_shi.split_examples(r)
+        return len(restos)
+
+    f, rdr, hdrs = limpiar.open_csv_any(LIMPIAR_CSV)
+    with f:
+        cols = limpiar.expect_cols(hdrs); filas_limpiar = list(rdr)
+    def process_row():
+        for fn in (limpiar.rasgos, limpiar.clean_noise): fn.cache_clear()   # cada repetición en frío
+        for r in filas_limpiar: limpiar.process_row(r, cols)
+        return len(filas_limpiar)
+
+    # índices de búsqueda sobre los CSV del repo (la construcción no se mide aquí)
+    csvs = ["diccionario_utf8.csv", "diccionario_shi_es.csv", "diccionario_es_shi.csv"]
+    construir_indice(csvs, tmp / "indice.idx"); idx = IndiceInvertido.cargar(tmp / "indice.idx")
+    pila.callback(idx.cerrar)
+    construir_ac(csvs, tmp / "ac.tbl"); ac = Autocompletar(tmp / "ac.tbl"); pila.callback(ac.cerrar)
+    construir_bm25(csvs, tmp / "bm25.npz"); bm = BM25.cargar(tmp / "bm25.npz")
+    dif = IndiceDifuso.desde_csv(csvs)
+    limpiar_csv = tmp / "limpio.csv"
+    with limpiar_csv.open("w", encoding="utf-8", newline="") as fo:
+        w = csv.writer(fo); w.writerow(FilaLimpia.CAMPOS)
+        for r in filas_limpiar: w.writerow(limpiar.process_row(r, cols)[0].fila())
+    cargar_fts5(tmp / "motor.db", [limpiar_csv]); fts = MotorFTS5(tmp / "motor.db"); pila.callback(fts.cerrar)
+
+    heads = [h for h, _, _ in dif.formas]
+    rnd = random.Random(0)
+    consultas = rnd.sample(heads, min(N_CONSULTAS, len(heads)))
+    errores = [q[:-1] + "x" if len(q) > 3 else q for q in consultas]
+    prefijos = [q[:max(1, len(q) // 2)] for q in consultas]
+
+    def consultar(fn, qs):
+        return lambda: sum(1 for q in qs if fn(q) is not None)
+
+    return [
+        ("lines_in_reading_order", "pág", orden_lectura),
+        ("segment_pdf (shi)", "fila", segment_pdf),
+        ("extraer_es_shi.run", "fila", es_shi_run),
+        ("split_examples", "fila", split_examples),
+        ("process_row", "fila", process_row),
+        ("indice_invertido.buscar", "cons", consultar(idx.buscar, consultas)),
+        ("busqueda_difusa.buscar", "cons", consultar(dif.buscar, errores)),
+        ("autocompletar.sugerir", "cons", consultar(ac.sugerir, prefijos)),
+        ("bm25.buscar", "cons", consultar(bm.buscar, consultas)),
+        ("motor_fts5.buscar", "cons", consultar(fts.buscar, consultas)),
+    ]
+
+# --- salida comparable ---
+
+def commit_actual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "?"
+
+def ultimo_bloque(ruta: Path):
+    """{etapa: unidades/s} del último bloque de la salida (para comparar)."""
+    if not ruta.exists(): return {}
+    bloques = ruta.read_text(encoding="utf-8").split("\n## ")
+    previo = {}
+    for ln in bloques[-1].splitlines()[1:]:
+        partes = ln.split("  ")
+        partes = [p.strip() for p in partes if p.strip()]
+        if len(partes) >= 2 and partes[0] != "etapa":
+            try: previo[partes[0]] = float(partes[1].split()[0])
+            except ValueError: pass
+    return previo
+
+def main():
+    paginas = int(arg("--paginas", "40"))
+    reps = int(arg("--reps", "3"))
+    salida = Path(arg("--salida", "bench_output.txt"))
+    previo = ultimo_bloque(salida)
+
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp:
+        tmp = Path(tmp)
+        pdf = tmp / "sintetico.pdf"
+        shi, es = pdf_sintetico(pdf, paginas)
+        lineas = [f"## {datetime.now():%Y-%m-%d %H:%M} {commit_actual()} | Python {sys.version.split()[0]} | "
+                  f"PyMuPDF {fitz.VersionBind} | {paginas} págs. sintéticas, mejor de {reps}",
+                  f"{'etapa':<26}{'unidades/s':>16}{'total ms':>11}{'pico alloc KB':>15}{'RSS máx MB':>12}{'vs. anterior':>14}"]
+        print(lineas[0])
+        print(lineas[1])
+        with etapas(pdf, shi, es, tmp) as lista:
+            for nombre, unidad, fn in lista:
+                dt, n, pico = medir(fn, reps)
+                tasa = n / dt if dt else 0.0
+                delta = f"{(tasa / previo[nombre] - 1) * 100:+.1f}%" if previo.get(nombre) else "-"
+                ln = (f"{nombre:<26}{tasa:>11.1f} {unidad:<4}{dt*1000:>11.2f}"
+                      f"{pico/1024:>15.0f}{rss_max_mb():>12.1f}{delta:>14}")
+                print(ln)
+                lineas.append(ln)
+
+    nuevo = not salida.exists() or salida.stat().st_size == 0
+    with salida.open("a", encoding="utf-8") as f:
+        f.write(("" if nuevo else "\n") + "\n".join(lineas) + "\n")
+    print(f"→ {salida}")
+
+if __name__ == "__main__":
+    main()
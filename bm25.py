@@ -0,0 +1,144 @@
+# bm25.py
+# Ranking BM25 sobre definiciones y ejemplos (entry_text, gloss_es, def_es, examples_es),
+# con las estadísticas en arreglos NumPy: postings en CSR (indptr/docs/tf) + largo de cada documento.
+# Uso:
+#   python bm25.py construir bm25.npz diccionario_utf8.csv diccionario_shi_es.csv diccionario_es_shi.csv
+#   python bm25.py buscar bm25.npz "hacer caer" [--k 10]
+#
+# Puntuar una consulta = por cada término, un slice de docs/tf, una expresión vectorizada y
+# una suma indexada sobre el arreglo de puntajes; el top-k sale de argpartition.
+# Las cadenas (términos, fuente y headword de cada documento) van como un heap UTF-8 + offsets
+# (igual que tabla_mmap.py), no como arreglos "<U n" rellenados hasta la más larga.
+
+import sys, time
+from collections import Counter
+from pathlib import Path
+import numpy as np
+from indice_invertido import tokenizar
+from comun import norm
+from limpiar_entradas_v2 import open_csv_any
+
+CAMPOS = ("entry_text", "gloss_es", "def_es", "examples_es")
+K1, B = 1.2, 0.75
+
+def empaquetar(cadenas):
+    """Lista de str → (heap UTF-8 uint8, offsets int64 de largo n+1)."""
+    partes = [s.encode("utf-8") for s in cadenas]
+    offsets = np.zeros(len(partes) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in partes])
+    return np.frombuffer(b"".join(partes), dtype=np.uint8), offsets
+
+class Cadenas:
+    """Vista de un heap UTF-8 + offsets: cada cadena se decodifica al pedirla."""
+    def __init__(self, heap, offsets):
+        self.heap, self.offsets = heap.tobytes(), offsets.tolist()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.heap[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+def construir(rutas, destino):
+    """Tokeniza los CSV y guarda vocabulario, postings CSR, largos y metadatos de cada documento."""
+    vocab, por_termino = {}, []     # término → id; id → [(doc, tf)]
+    largos, fuentes, filas, heads = [], [], [], []
+    for ruta in rutas:
+        ruta = Path(ruta)
+        f, rdr, _ = open_csv_any(ruta)
+        with f:
+            campos = [c for c in CAMPOS if c in (rdr.fieldnames or [])]
+            col_head = "es_head" if "es_head" in (rdr.fieldnames or []) else "headword"
+            for fila, row in enumerate(rdr):
+                doc = len(largos)
+                tf = Counter(t for c in campos for t in tokenizar(row[c]))
+                for t, n in tf.items():
+                    i = vocab.get(t)
+                    if i is None:
+                        i = vocab[t] = len(por_termino); por_termino.append([])
+                    por_termino[i].append((doc, n))
+                largos.append(sum(tf.values()))
+                fuentes.append(ruta.stem); filas.append(fila); heads.append(norm(row.get(col_head)))
+
+    indptr = np.zeros(len(por_termino) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(p) for p in por_termino])
+    docs = np.fromiter((d for p in por_termino for d, _ in p), dtype=np.int32, count=indptr[-1])
+    tf = np.fromiter((n for p in por_termino for _, n in p), dtype=np.float32, count=indptr[-1])
+    cadenas = {}
+    for nombre, lista in (("terminos", list(vocab)), ("fuentes", fuentes), ("heads", heads)):
+        cadenas[nombre], cadenas[nombre + "_off"] = empaquetar(lista)
+    with open(destino, "wb") as f:   # archivo abierto: np.savez no le agrega ".npz" al nombre
+        np.savez(f, indptr=indptr, docs=docs, tf=tf, largos=np.array(largos, dtype=np.float32),
+                 filas=np.array(filas, dtype=np.int32), **cadenas)
+    return len(largos), len(vocab)
+
+class BM25:
+    def __init__(self, terminos, indptr, docs, tf, largos, fuentes=None, filas=None, heads=None,
+                 k1: float = K1, b: float = B):
+        self.vocab = {t: i for i, t in enumerate(terminos)}
+        self.indptr, self.docs, self.tf, self.largos = indptr, docs, tf, largos
+        self.fuentes, self.filas, self.heads = fuentes, filas, heads
+        n = len(largos)
+        df = np.diff(indptr).astype(np.float32)
+        self.idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        # denominador por documento: k1·(1 - b + b·largo/largo_medio), se suma a tf al puntuar
+        medio = float(largos.mean()) if n else 1.0
+        self.norma = (k1 * (1 - b + b * largos / (medio or 1.0))).astype(np.float32)
+        self.k1 = k1
+
+    @classmethod
+    def cargar(cls, ruta, **kw):
+        z = np.load(ruta)
+        cad = {n: Cadenas(z[n], z[n + "_off"]) for n in ("terminos", "fuentes", "heads")}
+        return cls(cad["terminos"], z["indptr"], z["docs"], z["tf"], z["largos"],
+                   cad["fuentes"], z["filas"], cad["heads"], **kw)
+
+    def puntajes(self, consulta: str):
+        """Arreglo con el puntaje BM25 de cada documento (0 si no contiene ningún término)."""
+        sc = np.zeros(len(self.largos), dtype=np.float32)
+        for t in dict.fromkeys(tokenizar(consulta)):
+            i = self.vocab.get(t)
+            if i is None: continue
+            a, z = self.indptr[i], self.indptr[i+1]
+            d, tf = self.docs[a:z], self.tf[a:z]
+            sc[d] += self.idf[i] * tf * (self.k1 + 1) / (tf + self.norma[d])  # docs únicos por término
+        return sc
+
+    def buscar(self, consulta: str, k: int = 10):
+        """[(doc, puntaje)] de los k mejores, de mayor a menor."""
+        sc = self.puntajes(consulta)
+        k = min(k, int(np.count_nonzero(sc)))
+        if k <= 0: return []
+        top = np.argpartition(-sc, k - 1)[:k]
+        top = top[np.lexsort((top, -sc[top]))]
+        return [(int(d), float(sc[d])) for d in top]
+
+    def doc(self, d: int):
+        return {"fuente": self.fuentes[d], "fila": int(self.filas[d]), "headword": self.heads[d]}
+
+def main():
+    if len(sys.argv) < 4 or sys.argv[1] not in ("construir", "buscar"):
+        print('Uso: python bm25.py construir bm25.npz A.csv [B.csv ...]')
+        print('     python bm25.py buscar bm25.npz "consulta" [--k 10]')
+        sys.exit(1)
+    ruta = Path(sys.argv[2])
+    if sys.argv[1] == "construir":
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        n_docs, n_terms = construir(sys.argv[3:], ruta)
+        print(f"OK: {n_docs} documentos, {n_terms} términos → {ruta} ({ruta.stat().st_size} bytes)")
+        return
+    k = int(sys.argv[sys.argv.index("--k") + 1]) if "--k" in sys.argv else 10
+    idx = BM25.cargar(ruta)
+    t0 = time.perf_counter()
+    res = idx.buscar(sys.argv[3], k)
+    dt = (time.perf_counter() - t0) * 1000
+    for d, s in res:
+        r = idx.doc(d)
+        print(f"{s:7.3f}\t{r['fuente']}:{r['fila']}\t{r['headword']}")
+    print(f"{len(res)} resultados de {len(idx.largos)} documentos en {dt:.3f} ms")
+
+if __name__ == "__main__":
+    main()
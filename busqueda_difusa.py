@@ -0,0 +1,135 @@
+# busqueda_difusa.py
+# Búsqueda tolerante a errores sobre headwords (estilo SymSpell: diccionario de borrados).
+# Uso:
+#   python busqueda_difusa.py diccionario_shi_es.csv "aanutulli" [--k 2]
+#
+# Las claves se pliegan con norm() (’ ʼ → ') y en minúscula; además se indexan SIN apóstrofos,
+# así "aanutulli" encuentra "a'anu'tulli" a distancia 0 y el desempate usa la forma completa.
+
+import sys, time
+from pathlib import Path
+from comun import norm
+from limpiar_entradas_v2 import open_csv_any
+
+def clave(s: str) -> str:
+    return norm(s).lower()
+
+def sin_glotal(s: str) -> str:
+    return s.replace("'", "")
+
+def borrados(palabra: str, k: int):
+    """Todas las cadenas que se obtienen borrando hasta k caracteres (incluida la palabra)."""
+    res, frontera = {palabra}, {palabra}
+    for _ in range(k):
+        sig = set()
+        for w in frontera:
+            if len(w) <= 1: continue
+            for i in range(len(w)):
+                sig.add(w[:i] + w[i+1:])
+        sig -= res
+        res |= sig; frontera = sig
+    return res
+
+def distancia(a: str, b: str, k: int) -> int:
+    """Damerau-Levenshtein (OSA) en banda |i-j| ≤ k: devuelve k+1 si supera k."""
+    if a == b: return 0
+    la, lb = len(a), len(b)
+    if abs(la - lb) > k: return k + 1
+    tope = k + 1     # fuera de la banda el valor real ya es > k
+    ant2, ant = None, [j if j <= k else tope for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        cur = [tope] * (lb + 1)
+        if i <= k: cur[0] = i
+        ca = a[i-1]
+        minimo = cur[0]
+        for j in range(max(1, i - k), min(lb, i + k) + 1):
+            cb = b[j-1]
+            v = ant[j-1] + (ca != cb)
+            x = ant[j] + 1
+            if x < v: v = x
+            x = cur[j-1] + 1
+            if x < v: v = x
+            if ant2 is not None and j > 1 and ca == b[j-2] and a[i-2] == cb:
+                x = ant2[j-2] + 1
+                if x < v: v = x
+            if v > tope: v = tope
+            cur[j] = v
+            if v < minimo: minimo = v
+        if minimo > k: return tope
+        ant2, ant = ant, cur
+    return ant[lb]
+
+class IndiceDifuso:
+    def __init__(self, palabras, k_max: int = 2):
+        """palabras: iterable de (headword, peso); el peso desempata (p.ej. nº de filas)."""
+        self.k_max = k_max
+        self.formas = []              # [[headword, clave, peso]]
+        self.por_sg = {}              # clave sin apóstrofos → [ids de formas]
+        ids = {}
+        for head, peso in palabras:
+            c = clave(head)
+            if not c: continue
+            i = ids.get(c)
+            if i is not None:
+                self.formas[i][2] += peso
+                continue
+            ids[c] = len(self.formas)
+            self.formas.append([norm(head), c, peso])
+            self.por_sg.setdefault(sin_glotal(c), []).append(ids[c])
+
+        self.borr = {}                # borrado → [claves sin apóstrofos]
+        for sg in self.por_sg:
+            for d in borrados(sg, k_max):
+                self.borr.setdefault(d, []).append(sg)
+
+    @classmethod
+    def desde_csv(cls, rutas, columna: str = "headword", k_max: int = 2):
+        def palabras():
+            for ruta in rutas:
+                f, rdr, _ = open_csv_any(Path(ruta))
+                with f:
+                    for row in rdr:
+                        yield row[columna], 1
+        return cls(palabras(), k_max)
+
+    def buscar(self, consulta: str, k: int = None, limite: int = 10):
+        """
+        Candidatos a distancia ≤ k, ordenados por (distancia sin apóstrofos,
+        distancia de la forma completa, -peso). Devuelve [(headword, distancia)].
+        """
+        k = self.k_max if k is None else min(k, self.k_max)
+        q = clave(consulta)
+        q_sg = sin_glotal(q)
+        if not q_sg: return []
+        vistos, res = set(), []
+        for d in borrados(q_sg, k):
+            for sg in self.borr.get(d, ()):
+                if sg in vistos: continue
+                vistos.add(sg)
+                dist = distancia(q_sg, sg, k)
+                if dist > k: continue
+                for i in self.por_sg[sg]:
+                    head, c, peso = self.formas[i]
+                    res.append((dist, distancia(q, c, k + 2), -peso, head))
+        res.sort()
+        return [(head, dist) for dist, _, _, head in res[:limite]]
+
+def main():
+    args = [a for a in sys.argv[1:]]
+    k = 2
+    if "--k" in args:
+        i = args.index("--k"); k = int(args[i+1]); del args[i:i+2]
+    if len(args) < 2:
+        print('Uso: python busqueda_difusa.py diccionario_shi_es.csv [otro.csv ...] "consulta" [--k 2]')
+        sys.exit(1)
+    t0 = time.perf_counter()
+    idx = IndiceDifuso.desde_csv(args[:-1], k_max=k)
+    t1 = time.perf_counter()
+    res = idx.buscar(args[-1], k)
+    t2 = time.perf_counter()
+    for head, dist in res:
+        print(f"{dist}\t{head}")
+    print(f"{len(idx.formas)} headwords, {len(idx.borr)} borrados (construcción {t1-t0:.2f} s) | consulta {(t2-t1)*1000:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# cache_paginas.py
+# Caché de líneas por página: se corre PyMuPDF una sola vez y los extractores leen de aquí.
+# Uso:
+#   python cache_paginas.py shiwilu-dictionary2.pdf          → construye (o reutiliza) la caché
+#   python extraer_diccionario_dual.py shiwilu-dictionary2.pdf ... --cache
+#
+# La caché vive junto al PDF en .cache_paginas/<sha1 del PDF>.v<VERSION>.lineas y es una
+# tabla mmap (ver tabla_mmap.py) con una fila por página:
+#   page | bloques (líneas en orden de lectura por columnas) | texto (get_text("text") lineal)
+# Si el PDF cambia, cambia el hash y se construye una caché nueva.
+
+import sys, hashlib
+from pathlib import Path
+from tabla_mmap import TablaMmap, escribir_tabla
+from maquetacion import lineas_en_orden_lote, LOTE
+from comun import norm
+
+VERSION = 3   # subir si cambia la lógica de orden de lectura (2: columnas por huecos, 3: sangría negativa en la canaleta; maquetacion.py)
+COLUMNAS = ("page", "bloques", "texto")
+
+def hash_pdf(pdf_path) -> str:
+    h = hashlib.sha1()
+    with Path(pdf_path).open("rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def ruta_cache(pdf_path) -> Path:
+    pdf_path = Path(pdf_path)
+    return pdf_path.parent / ".cache_paginas" / f"{hash_pdf(pdf_path)}.v{VERSION}.lineas"
+
+def lines_text(page):
+    return [norm(ln) for ln in page.get_text("text").splitlines() if norm(ln)]
+
+def construir_cache(pdf_path, destino):
+    import fitz
+    doc = fitz.open(str(pdf_path))
+    try:
+        def filas():
+            # orden de lectura de LOTE páginas con un solo orden_lectura()
+            for ini in range(0, len(doc), LOTE):
+                pages = [doc[i] for i in range(ini, min(ini + LOTE, len(doc)))]
+                for i, (page, lineas) in enumerate(zip(pages, lineas_en_orden_lote(pages)), ini):
+                    yield i + 1, "\n".join(lineas), "\n".join(lines_text(page))
+        destino = Path(destino)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        tmp = destino.with_suffix(".tmp")
+        n = escribir_tabla(tmp, COLUMNAS, filas())
+        tmp.replace(destino)   # atómico: un lector nunca ve una caché a medias
+        return n
+    finally:
+        doc.close()
+
+class CachePaginas:
+    """Acceso por índice de página (0-based, como doc[i]) a las líneas ya ordenadas."""
+    def __init__(self, ruta):
+        self.tabla = TablaMmap(ruta)
+        self._bloques = self.tabla.columna("bloques")
+        self._texto = self.tabla.columna("texto")
+
+    @classmethod
+    def de_pdf(cls, pdf_path):
+        """Abre la caché del PDF; la construye si no existe."""
+        ruta = ruta_cache(pdf_path)
+        if not ruta.exists():
+            construir_cache(pdf_path, ruta)
+        return cls(ruta)
+
+    def __len__(self):
+        return len(self.tabla)
+
+    def _lineas(self, i: int, col: int):
+        s = self.tabla.celda(i, col)
+        return s.split("\n") if s else []
+
+    def lineas(self, i: int):
+        """Equivalente a lines_in_reading_order(doc[i])."""
+        return self._lineas(i, self._bloques)
+
+    def lineas_texto(self, i: int):
+        """Equivalente a las líneas normalizadas de doc[i].get_text("text")."""
+        return self._lineas(i, self._texto)
+
+    def cerrar(self):
+        self.tabla.cerrar()
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python cache_paginas.py PDF")
+        sys.exit(1)
+    pdf = Path(sys.argv[1])
+    ruta = ruta_cache(pdf)
+    if ruta.exists():
+        print(f"Caché vigente: {ruta}")
+        return
+    n = construir_cache(pdf, ruta)
+    print(f"OK: {n} páginas → {ruta} ({ruta.stat().st_size} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# comun.py
+# Funciones que antes estaban copiadas en cada script: normalización de texto, argumentos
+# --clave valor y la separación de definición / ejemplos de las entradas ES→SHI.
+# Uso:
+#   from comun import norm, arg, split_examples
+# (el orden de lectura de una página es maquetacion.lines_in_reading_order)
+
+import sys, re
+
+BLANCOS = re.compile(r"\s+")
+FRASES = re.compile(r"(?<=[\.\!\?])\s+")
+APOSTROFO = re.compile(r"[A-Za-z0-9]+'[A-Za-z0-9]")          # a'cha, ma'llin…
+PALABRA_APOSTROFO = re.compile(r"\b[A-Za-z0-9\-]+'[A-Za-z0-9\-]+\b")
+
+def norm(s: str) -> str:
+    """Espacios simples, sin bordes, ’ y ʼ → '."""
+    return BLANCOS.sub(" ", str(s or "").strip()).replace("’","'").replace("ʼ","'")
+
+def arg(k, default):
+    for i,a in enumerate(sys.argv):
+        if a==k and i+1<len(sys.argv): return sys.argv[i+1]
+    return default
+
+def looks_shi_sentence(s: str) -> bool:
+    s = norm(s)
+    if APOSTROFO.search(s):
+        return True
+    if s.count("-") >= 2:
+        return True
+    if len(PALABRA_APOSTROFO.findall(s)) >= 2:
+        return True
+    return False
+
+def split_examples(rest: str):
+    """(definición, ejemplos shiwilu, ejemplos español) de una entrada ES→SHI, por oraciones."""
+    rest = norm(rest)
+    if not rest: return "", "", ""
+    sents = FRASES.split(rest)
+    shi, es = [], []
+    for s in sents:
+        if not s: continue
+        (shi if looks_shi_sentence(s) else es).append(s)
+    def_es = rest
+    for s in shi+es: def_es = def_es.replace(s, "")
+    return norm(def_es), norm(" ".join(shi)), norm(" ".join(es))
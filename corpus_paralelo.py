@@ -0,0 +1,253 @@
+# corpus_paralelo.py
+# Corpus paralelo shiwilu–español a nivel de oración: alineación por lote + índice de concordancias (KWIC).
+# Uso:
+#   python corpus_paralelo.py construir corpus.db diccionario_utf8.csv [diccionario_limpio.csv es_shi_estructurado.csv ...]
+#   python corpus_paralelo.py kwic corpus.db "a'cha" [--lado shi|es] [--ancho 40] [--n 50]
+#
+# Entrada (se detecta por la cabecera):
+#   headword,entry_text,page        crudo: unidades de process_row() de limpiar_entradas_v2.py
+#   ...,examples_shi,examples_es    limpio (" || ") o estructurado (por oraciones)
+#
+# Alineación (alinear_lote): por entrada, DP monótona con pasos 1-1, 2-1, 1-2, 1-0 y 0-1 sobre
+#   costo = delta²/2 (Gale-Church: largo en caracteres, razón es/shi RAZON)
+#           - ANCLA · anclas compartidas (números, nombres, préstamos: tokens iguales de 4+ letras)
+#           + penalización del paso.
+# Las matrices de largo y de anclas de todas las entradas se calculan juntas con NumPy;
+# solo la DP (matrices chicas) corre por entrada.
+#
+# Índice: SQLite con pares(id, headword, page, shi, es, costo) y una tabla FTS5 de contenido
+# externo sobre (shi, es) con el tokenizador de motor_fts5.py; kwic() responde desde el índice.
+
+import sys, re, math, time, sqlite3
+from pathlib import Path
+import numpy as np
+from indice_invertido import tokenizar, TOKEN_RE
+from motor_fts5 import TOKENIZADOR, consulta_fts
+from comun import norm, arg
+
+S2 = 6.8                 # varianza de Gale-Church
+RAZON = 0.66             # caracteres es / shi: razon_largos() sobre diccionario_utf8.csv
+ANCLA = 2.0
+MAX_ANCLAS = 2
+PASOS = {(1, 1): 0.0, (2, 1): 2.3, (1, 2): 2.3, (1, 0): 4.5, (0, 1): 4.5}
+LOTE = 5000
+LADOS = ("shi", "es")   # columnas de pares_fts consultables con --lado
+
+ESQUEMA = """
+CREATE TABLE pares (id INTEGER PRIMARY KEY, headword TEXT NOT NULL, page INTEGER NOT NULL,
+                    shi TEXT NOT NULL, es TEXT NOT NULL, costo REAL NOT NULL);
+"""
+
+def anclas(s: str):
+    """Tokens que sobreviven a la traducción: números, nombres propios, préstamos."""
+    return {t for t in tokenizar(s) if t.isdigit() or len(t) >= 4}
+
+# --- alineación por lote ---
+
+def razon_largos(entradas) -> float:
+    """Razón de caracteres es/shi en las entradas con igual nº de unidades de cada lado."""
+    shi = sum(len(u) for s, e in entradas if s and len(s) == len(e) for u in s)
+    es = sum(len(u) for s, e in entradas if s and len(s) == len(e) for u in e)
+    return es / shi if shi and es else 1.0
+
+def matrices(entradas):
+    """
+    Por entrada, (largos shi, largos es, anclas compartidas n×m), calculados sobre todo el lote:
+    las anclas salen de un solo cruce (entrada, token) entre las unidades shi y las es.
+    """
+    n = np.array([len(s) for s, _ in entradas], dtype=np.int64)
+    m = np.array([len(e) for _, e in entradas], dtype=np.int64)
+    ini_s = np.cumsum(n) - n
+    ini_e = np.cumsum(m) - m
+    ini_p = np.cumsum(n * m) - n * m
+    largo_s = np.array([len(u) for s, _ in entradas for u in s], dtype=float)
+    largo_e = np.array([len(u) for _, e in entradas for u in e], dtype=float)
+
+    vocab = {}
+    def filas(lado):
+        ks, ts, us = [], [], []
+        for k, par in enumerate(entradas):
+            for u, texto in enumerate(par[lado]):
+                for t in anclas(texto):
+                    ks.append(k); ts.append(vocab.setdefault(t, len(vocab))); us.append(u)
+        return np.array(ks, np.int64), np.array(ts, np.int64), np.array(us, np.int64)
+    ks, ts, us = filas(0)
+    ke, te, ue = filas(1)
+
+    A = np.zeros(int((n * m).sum()), dtype=np.int64)
+    if len(ks) and len(ke):
+        V = len(vocab)
+        clave_e = ke * V + te
+        orden = np.argsort(clave_e, kind="stable")
+        clave_e, ue = clave_e[orden], ue[orden]
+        clave_s = ks * V + ts
+        lo = np.searchsorted(clave_e, clave_s, "left")
+        cnt = np.searchsorted(clave_e, clave_s, "right") - lo
+        cual = np.repeat(np.arange(len(ks)), cnt)                       # fila shi de cada cruce
+        j = ue[lo[cual] + np.arange(cnt.sum()) - np.repeat(np.cumsum(cnt) - cnt, cnt)]
+        k = ks[cual]
+        A = np.bincount(ini_p[k] + us[cual] * m[k] + j, minlength=len(A))
+
+    for k in range(len(entradas)):
+        yield (largo_s[ini_s[k]:ini_s[k] + n[k]], largo_e[ini_e[k]:ini_e[k] + m[k]],
+               A[ini_p[k]:ini_p[k] + n[k] * m[k]].reshape(n[k], m[k]))
+
+def costo_bead(ls: float, le: float, anc: int, c: float) -> float:
+    if ls == 0 and le == 0: return 0.0
+    d = (le - c * ls) / math.sqrt(S2 * max(ls, 1.0))
+    return d * d / 2 - ANCLA * min(anc, MAX_ANCLAS)
+
+def dp(ls, le, A, c: float):
+    """Camino de costo mínimo; devuelve [(ids shi, ids es, costo)] de los pasos con ambos lados."""
+    n, m = len(ls), len(le)
+    INF = float("inf")
+    D = [[INF] * (m + 1) for _ in range(n + 1)]
+    atras = [[None] * (m + 1) for _ in range(n + 1)]
+    D[0][0] = 0.0
+    for i in range(n + 1):
+        for j in range(m + 1):
+            if i == j == 0: continue
+            for (a, b), pen in PASOS.items():
+                if a > i or b > j or D[i - a][j - b] == INF: continue
+                if a and b:
+                    anc = int(A[i - a:i, j - b:j].sum())
+                    paso = costo_bead(float(ls[i - a:i].sum()), float(le[j - b:j].sum()), anc, c)
+                else:
+                    paso = 0.0
+                v = D[i - a][j - b] + paso + pen
+                if v < D[i][j]:
+                    D[i][j], atras[i][j] = v, (a, b, paso + pen)
+    res, i, j = [], n, m
+    while i or j:
+        a, b, costo = atras[i][j]
+        if a and b:
+            res.append((list(range(i - a, i)), list(range(j - b, j)), costo))
+        i, j = i - a, j - b
+    return res[::-1]
+
+def alinear_lote(entradas, c: float = RAZON):
+    """entradas: [(unidades shi, unidades es)] → por entrada [(shi, es, costo)]."""
+    res = []
+    for (s, e), (ls, le, A) in zip(entradas, matrices(entradas)):
+        if not s or not e:
+            res.append([]); continue
+        res.append([(" ".join(s[i] for i in ii), " ".join(e[j] for j in jj), costo)
+                    for ii, jj, costo in dp(ls, le, A, c)])
+    return res
+
+# --- fuentes ---
+
+def oraciones(s: str):
+    return [x for x in re.split(r"(?<=[\.\!\?])\s+", norm(s)) if x]
+
+def unidades_csv(ruta: Path):
+    """(headword, page, unidades shi, unidades es) por fila, según el esquema."""
+    import limpiar_entradas_v2 as limpiar
+    f, rdr, hdrs = limpiar.open_csv_any(ruta)
+    with f:
+        if "entry_text" in hdrs:
+            cols = limpiar.expect_cols(hdrs)
+            for row in rdr:
+                c, shi, es = limpiar.process_row(row, cols)
+                yield c.headword, c.page, shi, es
+        elif "examples_shi" in hdrs:
+            partir = (lambda s: [x for x in map(norm, s.split("||")) if x]) if "gloss_es" in hdrs else oraciones
+            head = "headword" if "headword" in hdrs else "es_head"
+            for row in rdr:
+                yield norm(row[head]), row.get("page", ""), partir(row["examples_shi"]), partir(row["examples_es"])
+        else:
+            raise KeyError(f"Esquema no reconocido: {ruta} ({', '.join(hdrs)})")
+
+def construir(destino, rutas):
+    """Alinea por lotes de LOTE filas y guarda los pares con su índice FTS5. Devuelve nº de pares."""
+    destino = Path(destino)
+    tmp = destino.with_name(destino.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    con = sqlite3.connect(tmp, isolation_level=None)
+    for p in ("journal_mode = OFF", "synchronous = OFF", "cache_size = -65536"):
+        con.execute(f"PRAGMA {p}")
+    con.executescript(ESQUEMA)
+    con.execute(f"CREATE VIRTUAL TABLE pares_fts USING fts5(shi, es, content = 'pares', content_rowid = 'id', "
+                f"tokenize = \"{TOKENIZADOR}\")")
+    n = 0
+    def volcar(lote):
+        nonlocal n
+        filas = []
+        for (head, page, _, _), pares in zip(lote, alinear_lote([(s, e) for _, _, s, e in lote])):
+            for shi, es, costo in pares:
+                n += 1
+                filas.append((n, head, int(page) if str(page).isdigit() else 0, shi, es, round(costo, 3)))
+        con.execute("BEGIN"); con.executemany("INSERT INTO pares VALUES (?,?,?,?,?,?)", filas); con.execute("COMMIT")
+    for ruta in rutas:
+        lote = []
+        for fila in unidades_csv(Path(ruta)):
+            lote.append(fila)
+            if len(lote) >= LOTE:
+                volcar(lote); lote = []
+        if lote: volcar(lote)
+    con.execute("INSERT INTO pares_fts(pares_fts) VALUES ('rebuild')")
+    con.execute("INSERT INTO pares_fts(pares_fts) VALUES ('optimize')")
+    con.close()
+    tmp.replace(destino)
+    return n
+
+# --- concordancias ---
+
+def _lado_valido(lado: str):
+    # el lado va dentro del MATCH ("shi : (...)"): solo nombres de columna conocidos
+    if lado not in LADOS:
+        raise ValueError(f"Lado inválido: {lado!r} (shi o es)")
+
+class Corpus:
+    def __init__(self, ruta_db):
+        self.con = sqlite3.connect(f"file:{Path(ruta_db)}?mode=ro", uri=True, check_same_thread=False)
+
+    def cerrar(self):
+        self.con.close()
+
+    def buscar(self, consulta: str, lado: str = "shi", n: int = 50):
+        """Pares cuyo lado contiene todos los tokens de la consulta: [(id, headword, page, shi, es)]."""
+        _lado_valido(lado)
+        q = consulta_fts(consulta)
+        if not q: return []
+        return self.con.execute(
+            "SELECT p.id, p.headword, p.page, p.shi, p.es FROM pares_fts JOIN pares p ON p.id = pares_fts.rowid "
+            "WHERE pares_fts MATCH ? ORDER BY p.id LIMIT ?", (f"{lado} : ({q})", n)).fetchall()
+
+    def kwic(self, consulta: str, lado: str = "shi", ancho: int = 40, n: int = 50):
+        """[(izquierda, palabra, derecha, traducción, headword, page)], centrado en el primer token."""
+        _lado_valido(lado)
+        primero = next(tokenizar(consulta), None)
+        res = []
+        for _, head, page, shi, es in self.buscar(consulta, lado, n):
+            texto, otro = (shi, es) if lado == "shi" else (es, shi)
+            a, b = 0, 0
+            for m in TOKEN_RE.finditer(texto):
+                if next(tokenizar(m.group(0)), None) == primero:
+                    a, b = m.span(); break
+            res.append((texto[max(0, a - ancho):a], texto[a:b], texto[b:b + ancho], otro, head, page))
+        return res
+
+def main():
+    if len(sys.argv) < 4 or sys.argv[1] not in ("construir", "kwic"):
+        print('Uso: python corpus_paralelo.py construir corpus.db diccionario_utf8.csv [otros.csv ...]')
+        print('     python corpus_paralelo.py kwic corpus.db "a\'cha" [--lado shi|es] [--ancho 40] [--n 50]')
+        sys.exit(1)
+    ruta = Path(sys.argv[2])
+    if sys.argv[1] == "construir":
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        t0 = time.perf_counter()
+        n = construir(ruta, [a for a in sys.argv[3:] if not a.startswith("--")])
+        print(f"OK: {n} pares alineados en {time.perf_counter() - t0:.2f} s → {ruta} ({ruta.stat().st_size} bytes)")
+        return
+    corpus = Corpus(ruta)
+    ancho = int(arg("--ancho", "40"))
+    t0 = time.perf_counter()
+    res = corpus.kwic(sys.argv[3], arg("--lado", "shi"), ancho, int(arg("--n", "50")))
+    dt = (time.perf_counter() - t0) * 1000
+    for izq, pal, der, trad, head, page in res:
+        print(f"{izq:>{ancho}} [{pal}] {der:<{ancho}} | {trad}  ({head}, p.{page})")
+    print(f"{len(res)} concordancias en {dt:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# dedup.py
+# Dedup compartido por los extractores y limpiar_entradas_v2.py: guarda una huella de 8 bytes
+# (blake2b-64) por clave en vez de la tupla de textos completos.
+# Uso:
+#   from dedup import Vistos
+#   vistos = Vistos()
+#   if vistos.agregar(head, text): ...          → True la primera vez
+#   nueva, i = vistos.indice(head, text)        → i = orden de la primera aparición
+#
+#   python dedup.py salida.csv a.csv b.csv ... [--claves headword,entry_text] [--limite 2000000] [--disco vistos.db]
+#       → une CSV del mismo esquema (corridas sucesivas, tramos de páginas) sin duplicados, en streaming
+#
+# Pasado `limite` claves en memoria, las huellas se vuelcan a una tabla SQLite (archivo temporal
+# o --disco) y se siguen consultando allí. Con 64 bits la probabilidad de una colisión entre
+# 10^6 claves es ~3·10^-8.
+
+import sys, csv, sqlite3, tempfile, hashlib, time
+from pathlib import Path
+from comun import arg
+
+LIMITE = 2_000_000
+SEP = "\x1f".encode("utf-8")
+# clave de dedup por esquema (la misma que usa cada escritor)
+CLAVES = {
+    "es_head": ("es_head", "shi_lemma", "pos", "def_es", "page"),   # extraer_es_shi.py
+    "gloss_es": ("headword", "gloss_es", "page"),                   # limpiar_entradas_v2.py
+    "entry_text": ("headword", "entry_text"),                       # extraer_diccionario*.py
+}
+
+def huella(*campos) -> int:
+    """blake2b de 8 bytes de los campos (str) como entero con signo (cabe en un INTEGER de SQLite)."""
+    h = hashlib.blake2b(SEP.join(str(c).encode("utf-8") for c in campos), digest_size=8)
+    return int.from_bytes(h.digest(), "little", signed=True)
+
+class Vistos:
+    def __init__(self, limite: int = LIMITE, ruta=None):
+        self.limite, self.ruta = limite, ruta
+        self._mem = {}        # huella → índice de primera aparición
+        self._con = None
+        self._tmp = None
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.cerrar()
+
+    def _volcar(self):
+        if self._con is None:
+            if self.ruta is None:
+                self._tmp = tempfile.NamedTemporaryFile(prefix="vistos_", suffix=".db", delete=False)
+                self._tmp.close()
+            self._con = sqlite3.connect(self.ruta or self._tmp.name, isolation_level=None)
+            for p in ("journal_mode = OFF", "synchronous = OFF", "cache_size = -65536"):
+                self._con.execute(f"PRAGMA {p}")
+            self._con.execute("DROP TABLE IF EXISTS vistos")
+            self._con.execute("CREATE TABLE vistos (h INTEGER PRIMARY KEY, i INTEGER NOT NULL)")
+        self._con.execute("BEGIN")
+        self._con.executemany("INSERT INTO vistos VALUES (?, ?)", self._mem.items())
+        self._con.execute("COMMIT")
+        self._mem.clear()
+
+    def _buscar(self, h: int):
+        i = self._mem.get(h)
+        if i is None and self._con is not None:
+            r = self._con.execute("SELECT i FROM vistos WHERE h = ?", (h,)).fetchone()
+            i = r[0] if r else None
+        return i
+
+    def indice(self, *campos):
+        """(nueva, índice de la primera aparición de la clave)."""
+        h = huella(*campos)
+        i = self._buscar(h)
+        if i is not None:
+            return False, i
+        i = self.n
+        self._mem[h] = i
+        self.n += 1
+        if self.limite and len(self._mem) >= self.limite:
+            self._volcar()
+        return True, i
+
+    def agregar(self, *campos) -> bool:
+        return self.indice(*campos)[0]
+
+    def __contains__(self, campos) -> bool:
+        return self._buscar(huella(*campos)) is not None
+
+    def cerrar(self):
+        if self._con is not None:
+            self._con.close(); self._con = None
+        if self._tmp is not None:
+            Path(self._tmp.name).unlink(missing_ok=True); self._tmp = None
+        self._mem.clear()
+
+def claves_de(campos, pedidas=None):
+    if pedidas:
+        faltan = [c for c in pedidas if c not in campos]
+        if faltan: raise KeyError(f"Columnas inexistentes: {', '.join(faltan)}")
+        return tuple(pedidas)
+    for marca, claves in CLAVES.items():
+        if marca in campos: return claves
+    return tuple(campos)   # esquema desconocido: fila completa
+
+def unir(salida, entradas, claves=None, limite: int = LIMITE, ruta=None):
+    """Copia las filas de `entradas` (mismo encabezado) a `salida` sin repetir clave. Devuelve (leídas, escritas)."""
+    leidas = escritas = 0
+    salida = Path(salida)
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    with Vistos(limite, ruta) as vistos, salida.open("w", encoding="utf-8", newline="") as fo:
+        w, campos = None, None
+        for ruta_csv in entradas:
+            with open(ruta_csv, "r", encoding="utf-8", newline="") as f:
+                rdr = csv.reader(f)
+                cab = next(rdr, None)
+                if cab is None: continue
+                if w is None:
+                    campos = cab
+                    pos = [campos.index(c) for c in claves_de(campos, claves)]
+                    w = csv.writer(fo); w.writerow(campos)
+                elif cab != campos:
+                    raise ValueError(f"{ruta_csv}: encabezado distinto de {entradas[0]}")
+                for row in rdr:
+                    leidas += 1
+                    if vistos.agregar(*(row[k] for k in pos)):
+                        w.writerow(row); escritas += 1
+    return leidas, escritas
+
+def main():
+    args = [a for i, a in enumerate(sys.argv[1:], 1)
+            if not a.startswith("--") and sys.argv[i - 1] not in ("--claves", "--limite", "--disco")]
+    if len(args) < 2:
+        print("Uso: python dedup.py salida.csv a.csv [b.csv ...] [--claves col1,col2] [--limite 2000000] [--disco vistos.db]")
+        sys.exit(1)
+    claves = arg("--claves", None)
+    t0 = time.perf_counter()
+    leidas, escritas = unir(args[0], args[1:], claves.split(",") if claves else None,
+                            int(arg("--limite", str(LIMITE))), arg("--disco", None))
+    print(f"OK: {leidas} filas de {len(args) - 1} CSV, {escritas} sin duplicados "
+          f"({leidas - escritas} repetidas) en {time.perf_counter() - t0:.2f} s → {args[0]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# entradas_perezosas.py
+# Entradas estructuradas bajo demanda: el texto crudo queda en una tabla mmap (solo offsets) y
+# process_row() de limpiar_entradas_v2.py corre la primera vez que se pide una fila; el resultado
+# queda en una LRU acotada.
+# Uso:
+#   from entradas_perezosas import EntradasPerezosas
+#   ent = EntradasPerezosas(TablaMmap("diccionario_utf8.tbl"))     (o los .docs de indice_invertido.py)
+#   ent.entrada(i)  → {"headword", "pos", "gloss_es", "examples_shi", "examples_es", "page", "ejemplos"}
+#
+#   python entradas_perezosas.py diccionario_utf8.csv [--consultas 20000] [--maximo 1024]
+#       → compara con procesar todo al arrancar: tiempo de arranque, memoria, aciertos de la LRU
+#
+# "ejemplos" son los pares (shi, es) alineados (corpus_paralelo.py). Las consultas del banco siguen
+# una Zipf (s = 1.1): pocas entradas calientes, cola larga de entradas que casi nadie abre.
+
+import sys, time, random, tempfile, threading, tracemalloc
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from tabla_mmap import TablaMmap, csv_a_tabla
+from limpiar_entradas_v2 import process_row, align_pairs, open_csv_any, expect_cols
+from comun import arg
+
+MAXIMO = 1024
+COLS = {"headword": "headword", "entry_text": "entry_text", "page": "page"}
+
+def estructurar(headword: str, entry_text: str, page: str):
+    c, shi, es = process_row({"headword": headword, "entry_text": entry_text, "page": page}, COLS)
+    c = c.a_dict()
+    c["ejemplos"] = align_pairs(shi, es)
+    return c
+
+class EntradasPerezosas:
+    """Fila i de la tabla → entrada estructurada; las últimas `maximo` quedan en memoria. Segura entre hilos."""
+    def __init__(self, tabla: TablaMmap, maximo: int = MAXIMO):
+        self.tabla, self.maximo = tabla, maximo
+        self._cols = tuple(tabla.columna(c) for c in ("headword", "entry_text", "page"))
+        self.datos = OrderedDict()
+        self.aciertos = self.fallos = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.tabla)
+
+    def entrada(self, i: int):
+        with self._lock:
+            if i in self.datos:        # None también se guarda (fila sin entry_text)
+                self.datos.move_to_end(i)
+                self.aciertos += 1
+                return self.datos[i]
+            self.fallos += 1
+        h, t, p = (self.tabla.celda(i, j) for j in self._cols)
+        c = estructurar(h, t, p) if t else None
+        with self._lock:
+            self.datos[i] = c
+            while len(self.datos) > self.maximo:
+                self.datos.popitem(last=False)
+        return c
+
+# --- banco: todo al arrancar vs. bajo demanda ---
+
+def todo_al_arrancar(ruta_csv):
+    f, rdr, hdrs = open_csv_any(Path(ruta_csv))
+    with f:
+        cols = expect_cols(hdrs)
+        filas = []
+        for row in rdr:
+            c, shi, es = process_row(row, cols)
+            c = c.a_dict()
+            c["ejemplos"] = align_pairs(shi, es)
+            filas.append(c)
+    return filas
+
+def medir(fn):
+    """(resultado, segundos, bytes que siguen asignados); la memoria sale de una corrida aparte."""
+    t0 = time.perf_counter()
+    res = fn()
+    dt = time.perf_counter() - t0
+    tracemalloc.start()
+    otro = fn()
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del otro
+    return res, dt, actual
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python entradas_perezosas.py diccionario_utf8.csv [--consultas 20000] [--maximo 1024]")
+        sys.exit(1)
+    ruta = Path(sys.argv[1])
+    n_cons = int(arg("--consultas", "20000"))
+    maximo = int(arg("--maximo", str(MAXIMO)))
+
+    filas, t_todo, mem_todo = medir(lambda: todo_al_arrancar(ruta))
+    with tempfile.TemporaryDirectory(prefix="perezosas_") as tmp:
+        tbl = Path(tmp) / "entradas.tbl"
+        t0 = time.perf_counter(); csv_a_tabla(ruta, tbl); t_tbl = time.perf_counter() - t0
+        ent, t_abrir, mem_abrir = medir(lambda: EntradasPerezosas(TablaMmap(tbl), maximo))
+        ent2 = EntradasPerezosas(TablaMmap(tbl), maximo)
+
+        n = len(ent)
+        rnd = np.random.default_rng(0)
+        perm = rnd.permutation(n)                         # qué filas son las calientes
+        consultas = perm[np.minimum(rnd.zipf(1.1, n_cons) - 1, n - 1)].tolist()
+        t0 = time.perf_counter()
+        for i in consultas: ent.entrada(i)
+        t_cons = time.perf_counter() - t0
+        aciertos, total = ent.aciertos, ent.aciertos + ent.fallos
+        tracemalloc.start()                               # lo que queda en la LRU tras las consultas
+        for i in consultas: ent2.entrada(i)
+        mem_cons, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        distintas = sum(1 for i in random.Random(0).sample(range(n), min(n, 500)) if ent.entrada(i) != filas[i])
+        ent.tabla.cerrar(); ent2.tabla.cerrar()
+
+    print(f"{n} filas, {n_cons} consultas Zipf(1.1), LRU de {maximo}")
+    print(f"  todo al arrancar   {t_todo*1000:9.1f} ms   {mem_todo/1024:9.0f} KB residentes")
+    print(f"  bajo demanda       {t_abrir*1000:9.1f} ms   {mem_abrir/1024:9.0f} KB al abrir "
+          f"(+ {t_tbl*1000:.0f} ms una vez para la tabla mmap)")
+    print(f"  consultas          {t_cons/n_cons*1e6:9.1f} µs/consulta, aciertos {aciertos}/{total} "
+          f"({aciertos/total:.1%}), LRU {mem_cons/1024:.0f} KB")
+    print(f"  mismo resultado que process_row en {500 - distintas}/500 filas al azar")
+
+if __name__ == "__main__":
+    main()
@@ -1,158 +1,37 @@
-# extraer_es_shi_v4.py
-# Extrae Español→Shiwilu (págs ~480–1076), acumulando cabeceras ES de varias líneas.
-# Uso: python extraer_es_shi_v4.py shiwilu-dictionary2.pdf es_shi.csv [--start 480] [--end 1076]
-
-import sys, re, csv, fitz
-from pathlib import Path
-
-def arg(k, default):
-    for i,a in enumerate(sys.argv):
-        if a==k and i+1<len(sys.argv): return sys.argv[i+1]
-    return default
-
-PDF = Path(sys.argv[1]) if len(sys.argv)>1 else None
-OUT = Path(sys.argv[2]) if len(sys.argv)>2 else None
-START = int(arg("--start","480"))-1  # 0-based
-END   = int(arg("--end","1076"))
-
-POS = r"(vb\.|vt\.|vi\.|adj\.|adv\.|nom\.|prt\.|s\.|interj\.|interrog\.|post\.|adpos\.|conect\.|conj\.)"
-
-# 2ª línea del encabezado: "api'ka'pi nom. a la brasa..."
-HDR_SECOND = re.compile(rf"^\*?\s*(?P<shi>[A-Za-zÁÉÍÓÚÑáéíóúñ0-9'’ʼ\-]+)\s+(?P<pos>{POS})\b(?P<rest>.*)$")
-
-TRASH = (
-    re.compile(r"^\d+$"),           # números de página/folio
-    re.compile(r"^yuyu'wa$", re.I), # encabezado de corrida
-)
-
-def is_trash(line: str) -> bool:
-    return any(p.match(line) for p in TRASH)
-
-def norm(s: str) -> str:
-    s = (s or "").strip()
-    s = re.sub(r"\s+", " ", s)
-    return s.replace("’","'").replace("ʼ","'")
-
-def looks_shi_sentence(s: str) -> bool:
-    s = norm(s)
-    if re.search(r"[A-Za-z0-9]+'[A-Za-z0-9]", s):  # a'cha, ma'llin…
-        return True
-    if s.count("-") >= 2:
-        return True
-    if len(re.findall(r"\b[A-Za-z0-9\-]+'[A-Za-z0-9\-]+\b", s)) >= 2:
-        return True
-    return False
-
-def split_examples(rest: str):
-    rest = norm(rest)
-    if not rest: return "", "", ""
-    sents = re.split(r"(?<=[\.\!\?])\s+", rest)
-    shi, es = [], []
-    for s in sents:
-        if not s: continue
-        (shi if looks_shi_sentence(s) else es).append(s)
-    def_es = rest
-    for s in shi+es: def_es = def_es.replace(s, "")
-    return norm(def_es), norm(" ".join(shi)), norm(" ".join(es))
-
-def lines_in_reading_order(page: fitz.Page):
-    blocks = page.get_text("blocks")  # (x0,y0,x1,y1,text,…)
-    mid = page.rect.width/2
-    L,R=[],[]
-    for x0,y0,x1,y1,txt,*_ in blocks:
-        (L if x0<mid else R).append((x0,y0,txt))
-    def dump(arr):
-        for x0,y0,txt in sorted(arr, key=lambda t:(round(t[1],1), round(t[0],1))):
-            for ln in txt.splitlines():
-                ln = norm(ln)
-                if ln: yield ln
-    for ln in dump(L): yield ln
-    for ln in dump(R): yield ln
-
-def run(pdf: Path):
-    doc = fitz.open(str(pdf))
-    rows=[]
-    # Buffers
-    es_buf = []          # varias líneas de español del encabezado
-    cur = None           # entrada en construcción
-    carry = ""           # palabra cortada con guion
-    n_headers = 0
-
-    for i in range(max(0,START), min(END, len(doc))):
-        page = doc[i]; pno = i+1
-
-        for raw in lines_in_reading_order(page):
-            ln = raw
-            # unir cortes con guion al final de línea
-            if carry:
-                ln = norm(carry + " " + ln); carry = ""
-            if raw.endswith("-") and re.search(r"[A-Za-zÁÉÍÓÚÑáéíóúñ]-$", raw):
-                carry = raw[:-1]
-                continue
-
-            if is_trash(ln):
-                continue
-
-            m2 = HDR_SECOND.match(ln)
-            if m2:
-                # Cierra entrada previa
-                if cur:
-                    rows.append(cur); cur = None
-
-                es_head = norm(" ".join(es_buf))
-                es_buf = []
-                cur = {
-                    "es_head": es_head if es_head else "",  # puede venir vacío si no hubo pre-líneas (raro)
-                    "shi_lemma": norm(m2.group("shi")),
-                    "pos": norm(m2.group("pos")),
-                    "rest": norm(m2.group("rest")),
-                    "page": pno
-                }
-                n_headers += 1
-                continue
-
-            # Si ya hay entrada abierta, acumula su texto
-            if cur:
-                cur["rest"] = norm(cur["rest"] + " " + ln)
-            else:
-                # Acumula candidatos de español de cabecera (puede ser varias líneas)
-                es_buf.append(ln)
-
-        # No arrastrar el buffer ES a la siguiente página (reduce falsos positivos)
-        # pero SÍ dejamos 'cur' abierto (puede seguir en la página siguiente)
-        es_buf = []
-
-    if cur:
-        rows.append(cur)
-
-    # Post-proc: separar definición y ejemplos
-    out=[]; seen=set()
-    for e in rows:
-        def_es, ex_shi, ex_es = split_examples(e["rest"])
-        key=(e["es_head"], e["shi_lemma"], e["pos"], def_es, e["page"])
-        if key in seen: continue
-        seen.add(key)
-        out.append(dict(
-            es_head=e["es_head"],
-            shi_lemma=e["shi_lemma"],
-            pos=e["pos"],
-            def_es=def_es,
-            examples_shi=ex_shi,
-            examples_es=ex_es,
-            page=e["page"]
-        ))
-
-    print(f"Detectados encabezados (ES→SHI): {n_headers} | Filas finales: {len(out)}")
-    return out
-
-if __name__=="__main__":
-    if not PDF or not OUT:
-        print("Uso: python extraer_es_shi_v4.py shiwilu-dictionary2.pdf es_shi.csv [--start 480] [--end 1076]")
-        sys.exit(1)
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    data = run(PDF)
-    with OUT.open("w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=["es_head","shi_lemma","pos","def_es","examples_shi","examples_es","page"])
-        w.writeheader()
-        w.writerows(data)
-    print(f"OK: {len(data)} filas → {OUT}")
\ No newline at end of file
+# extraer_es_shi_v4.py
+# Extrae Español→Shiwilu (págs ~480–1076), acumulando cabeceras ES de varias líneas.
+# Uso: python extraer_es_shi_v4.py shiwilu-dictionary2.pdf es_shi.csv [--start 480] [--end 1076] [--cache]
+# Misma segmentación que extraer_es_shi.py (leer_entradas, estructurar, sin_duplicados); solo cambia
+# el rango por defecto (hasta la pág. 1076) y el resumen.
+
+import sys
+from pathlib import Path
+from comun import arg
+from extraer_es_shi import abrir_paginas, leer_entradas, estructurar, sin_duplicados, escribir_csv
+
+def run(pdf: Path, start: int, end: int, cache: bool = False):
+    """Pipeline en streaming: cada fila sale en cuanto su entrada se cierra."""
+    n_pages, lineas_de, cerrar = abrir_paginas(pdf, cache)
+    try:
+        stats = {"encabezados": 0, "filas": 0}
+        yield from sin_duplicados(estructurar(leer_entradas(lineas_de, max(0,start), min(end, n_pages), stats)), stats)
+    finally:
+        cerrar()
+
+    print(f"Detectados encabezados (ES→SHI): {stats['encabezados']} | Filas finales: {stats['filas']}")
+
+def main():
+    if len(sys.argv) < 3:
+        print("Uso: python extraer_es_shi_v4.py shiwilu-dictionary2.pdf es_shi.csv [--start 480] [--end 1076] [--cache]")
+        sys.exit(1)
+    PDF = Path(sys.argv[1])
+    OUT = Path(sys.argv[2])
+    START = int(arg("--start","480"))-1  # 0-based
+    END   = int(arg("--end","1076"))
+    CACHE = "--cache" in sys.argv  # leer líneas de la caché de páginas
+
+    n = escribir_csv(OUT, run(PDF, START, END, CACHE))
+    print(f"OK: {n} filas → {OUT}")
+
+if __name__=="__main__":
+    main()
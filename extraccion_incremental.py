@@ -0,0 +1,135 @@
+# extraccion_incremental.py
+# Re-extracción incremental para extraer_diccionario_dual.py.
+# Uso:
+#   python extraer_diccionario_dual.py shiwilu-dictionary2.pdf --mode shi --from 5 --to 479 -o diccionario_shi_es.csv --incremental
+#
+# Junto al CSV se guarda OUT.manifest.json con:
+#   - la huella de las reglas: el código fuente completo de los módulos que dan forma a las filas
+#     (MODULOS: segmentación y filtro, modelo de entrada, norm, dedup) y las versiones de caché
+#     y de manifiesto,
+#   - un hash de las líneas de cada página del rango (tomadas de la caché de páginas),
+#   - por cada entrada cerrada: [página inicio, página fin, fila del CSV] (-1 si no pasó el filtro).
+# En la siguiente corrida solo se re-segmentan las páginas cuyo hash cambió, más sus vecinas
+# y las páginas de toda entrada que las toque; el resultado se empalma en el CSV existente.
+# Si cambian las reglas, el rango o el modo, se hace una extracción completa.
+
+import csv, json, hashlib, inspect
+from pathlib import Path
+import extraer_diccionario_dual as dual
+from cache_paginas import CachePaginas, VERSION as VERSION_CACHE
+from instrumentacion import NULO
+import modelo_entradas, comun, dedup
+from modelo_entradas import Entrada
+
+VERSION = 1
+# módulos cuyo código decide el contenido del CSV: se hashea el fuente entero (regex, constantes
+# como NO_INICIO, Entrada.cerrar, norm, escribir_csv...), así ningún cambio queda fuera de la huella
+MODULOS = (dual, modelo_entradas, comun, dedup)
+
+def huella_reglas(mode: str) -> str:
+    h = hashlib.sha1(f"{VERSION}|{VERSION_CACHE}|{mode}".encode("utf-8"))
+    for mod in MODULOS:
+        h.update(inspect.getsource(mod).encode("utf-8"))
+    return h.hexdigest()
+
+def huella_pagina(lineas) -> str:
+    return hashlib.sha1("\n".join(lineas).encode("utf-8")).hexdigest()[:16]
+
+def ruta_manifiesto(out: Path) -> Path:
+    return out.with_name(out.name + ".manifest.json")
+
+def leer_manifiesto(out: Path):
+    ruta = ruta_manifiesto(out)
+    if not (ruta.exists() and out.exists()):
+        return None
+    with ruta.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+def cargar_entradas(out: Path, man):
+    """Reconstruye la lista de entradas (antes de dedup) a partir del CSV y el manifiesto."""
+    with out.open("r", encoding="utf-8", newline="") as f:
+        rdr = csv.reader(f); next(rdr, None)
+        filas = [(r[0], r[1]) for r in rdr]
+    entries = []
+    for ini, fin, fila in man["entradas"]:
+        head, text = filas[fila] if fila >= 0 else ("", "")
+        entries.append(Entrada(head, ini, fin, entry_text=text, ok=fila >= 0))
+    return entries
+
+def regiones_sucias(sucias, entries, start_h: int, end_h: int):
+    """
+    Intervalos de páginas (humanas) a re-segmentar: cada página cambiada con sus vecinas,
+    ampliado hasta cubrir completas las entradas que lo tocan, y fusionando solapes.
+    """
+    regiones = sorted((max(start_h, p - 1), min(end_h, p + 1)) for p in sucias)
+    while True:
+        fusion = []
+        for a, b in regiones:
+            for e in entries:
+                if e.page <= b and e.page_end >= a:
+                    a, b = min(a, e.page), max(b, e.page_end)
+            if fusion and a <= fusion[-1][1] + 1:
+                fusion[-1] = (fusion[-1][0], max(b, fusion[-1][1]))
+            else:
+                fusion.append((a, b))
+        if fusion == regiones:
+            return regiones
+        regiones = fusion
+
+def escribir(out: Path, entries, mode: str, reglas: str, rango, huellas):
+    rows = [e for e in entries if e.ok]
+    kept, filas = dual.escribir_csv(out, rows, mode)
+    it = iter(filas)
+    man = {
+        "version": VERSION, "mode": mode, "reglas": reglas, "rango": list(rango),
+        "paginas": huellas,
+        "entradas": [[e.page, e.page_end, next(it) if e.ok else -1] for e in entries],
+    }
+    with ruta_manifiesto(out).open("w", encoding="utf-8") as f:
+        json.dump(man, f, separators=(",", ":"))
+    return kept
+
+def extraer_incremental(pdf: Path, desde: int, hasta: int, mode: str, out: Path, workers: int = 1, perfil=NULO):
+    cache = dual.preparar_cache(pdf)
+    paginas = CachePaginas(cache)
+    try:
+        start, end = dual.rango_paginas(len(paginas), desde, hasta)
+        huellas = {str(i + 1): huella_pagina(paginas.lineas(i)) for i in range(start, end + 1)}
+    finally:
+        paginas.cerrar()
+    reglas = huella_reglas(mode)
+    rango = (start + 1, end + 1)
+
+    man = leer_manifiesto(out)
+    if not man or man.get("version") != VERSION or man["mode"] != mode or man["rango"] != list(rango) or man["reglas"] != reglas:
+        motivo = "sin manifiesto" if not man else ("reglas cambiadas" if man["reglas"] != reglas else "rango/modo distinto")
+        entries, cand = dual.segmentar_rango(pdf, start, end, mode, workers, cache, perfil)
+        for e in entries: e.ok = dual.pasa_filtro(e, mode)
+        with perfil.medir("io"):
+            kept = escribir(out, entries, mode, reglas, rango, huellas)
+        print(f"[{mode}] Completa ({motivo}) | Candidatos: {cand} | Cerradas: {len(entries)} | Guardadas: {kept} → {out}")
+        return
+
+    sucias = sorted(int(p) for p, h in huellas.items() if man["paginas"].get(p) != h)
+    if not sucias:
+        print(f"[{mode}] Sin cambios → {out}")
+        return
+
+    viejas = cargar_entradas(out, man)
+    regiones = regiones_sucias(sucias, viejas, *rango)
+
+    entries, k = [], 0
+    for a, b in regiones:
+        while k < len(viejas) and viejas[k].page < a:
+            entries.append(viejas[k]); k += 1
+        while k < len(viejas) and viejas[k].page <= b:
+            k += 1   # reemplazadas por la re-segmentación
+        nuevas, _ = dual.segmentar_rango(pdf, a - 1, b - 1, mode, workers if b - a >= 8 else 1, cache, perfil)
+        for e in nuevas: e.ok = dual.pasa_filtro(e, mode)
+        entries.extend(nuevas)
+    entries.extend(viejas[k:])
+
+    with perfil.medir("io"):
+        kept = escribir(out, entries, mode, reglas, rango, huellas)
+    tramos = ", ".join(f"{a}–{b}" for a, b in regiones)
+    print(f"[{mode}] Incremental | Páginas cambiadas: {len(sucias)} | Re-segmentadas: {tramos} | Guardadas: {kept} → {out}")
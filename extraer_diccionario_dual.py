@@ -1,155 +1,284 @@
-# extraer_diccionario_dual.py
-# Uso:
-#   python extraer_diccionario_dual.py shiwilu-dictionary2.pdf --mode shi --from 5 --to 479 -o diccionario_shi_es.csv
-#   python extraer_diccionario_dual.py shiwilu-dictionary2.pdf --mode es  --from 480 --to 1076 -o diccionario_es_shi.csv
-
-import sys, re, csv, fitz, argparse
-from pathlib import Path
-
-TAG_RE = re.compile(r"\b(vb|vt|vi|adj|adv|nom|prt|s)\.?\b", re.I)
-
-def norm(s: str) -> str:
-    return re.sub(r"\s+", " ", str(s or "").strip()).replace("’","'").replace("ʼ","'")
-
-def looks_shiwilu_token(tok: str) -> bool:
-    if not tok: 
-        return False
-    # si empieza con signos/puntuación, NO es headword
-    if tok[0] in "¿¡\"'“”‘’([{•–—-":
-        return False
-    if len(tok) > 40:
-        return False
-    return ("'" in tok or "-" in tok)
-
-def looks_shiwilu_head(line: str) -> bool:
-    L = norm(line).lstrip("* ").strip()
-    if not L: return False
-    first = re.split(r"[\s,;:()]+", L, 1)[0]
-    return looks_shiwilu_token(first)
-
-def looks_spanish_head(line: str) -> bool:
-    L = norm(line).lstrip("* ").strip()
-    if not L: 
-        return False
-    first = re.split(r"[\s,;:()]+", L, 1)[0]
-    if first and first[0] in "¿¡\"'“”‘’([{•–—-":
-        return False
-    if "'" in first:
-        return False
-    return bool(re.match(r"^[A-Za-zÁÉÍÓÚÑáéíóúñ]+(?:[- ][A-Za-zÁÉÍÓÚÑáéíóúñ]+)*$", first))
-
-def is_header_line(line: str, mode: str) -> bool:
-    line_n = norm(line)
-    # exige etiqueta gramatical en la MISMA línea
-    if not TAG_RE.search(line_n[:120]):
-        return False
-    if mode == "shi":
-        first = re.split(r"[\s,;:()]+", line_n.lstrip("* ").strip(), 1)[0]
-        return looks_shiwilu_token(first)
-    else:
-        return looks_spanish_head(line_n)
-    
-def extract_headword(header_text: str) -> str:
-    L = norm(header_text).lstrip("* ").strip()
-    for tok in re.split(r"[ ,;:()]", L):
-        t = tok.strip()
-        if looks_shiwilu_token(t): return t
-    return L.split()[0] if L.split() else L
-
-def lines_in_reading_order(page: fitz.Page):
-    """Devuelve líneas en orden: columna izq (arriba->abajo), luego der."""
-    blocks = page.get_text("blocks")  # (x0,y0,x1,y1,text, block_no, ... )
-    mid_x = page.rect.width / 2
-    left, right = [], []
-    for b in blocks:
-        x0,y0,x1,y1,text,*_ = b
-        (left if x0 < mid_x else right).append((x0,y0,x1,y1,text))
-
-    def dump(blks):
-        blks.sort(key=lambda t: (round(t[1],1), round(t[0],1)))
-        for x0,y0,x1,y1,text in blks:
-            for ln in text.splitlines():
-                ln = norm(ln)
-                if ln: yield ln
-
-    # primero toda la izquierda, luego toda la derecha
-    for ln in dump(left):
-        yield ln
-    for ln in dump(right):
-        yield ln
-
-def segment_pdf(pdf_path: Path, start_human: int, end_human: int, mode: str):
-    doc = fitz.open(str(pdf_path))
-    start = max(0, start_human - 1)
-    end = min(len(doc)-1, end_human - 1)
-    if end < start: raise ValueError("Rango de páginas inválido.")
-
-    entries, cur = [], None
-    candidates = kept = 0
-
-    for i in range(start, end + 1):
-        page_no_human = i + 1
-        for ln in lines_in_reading_order(doc[i]):
-
-            # ignora cabeceras editoriales
-            if re.search(r"(?i)^(diccionario shiwilu|draft document|national science foundation)$", ln):
-                continue
-
-            is_header = is_header_line(ln, mode)
-            if is_header:
-                if cur and cur["entry_text"].strip():
-                    entries.append(cur); kept += 1
-                candidates += 1
-                cur = {"headword": extract_headword(ln), "entry_text": ln, "page": page_no_human}
-            else:
-                if cur:
-                    # une guiones de fin de línea (palabra- \n siguente)
-                    if cur["entry_text"].endswith("-"):
-                        cur["entry_text"] = cur["entry_text"][:-1] + ln
-                    else:
-                        cur["entry_text"] += " " + ln
-
-    if cur and cur["entry_text"].strip():
-        entries.append(cur); kept += 1
-
-    # Filtros finales
-    filtered = []
-    for e in entries:
-        txt = e["entry_text"]
-        has_tag = bool(TAG_RE.search(txt))
-        if mode == "shi":
-            if has_tag: filtered.append(e)
-        else:
-            has_shi_token = bool(re.search(r"[A-Za-z0-9]+'[A-Za-z0-9]+", txt))
-            if has_tag and has_shi_token: filtered.append(e)
-
-    return filtered, candidates, kept
-
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("pdf", type=str)
-    ap.add_argument("--mode", choices=["shi","es"], required=True)
-    ap.add_argument("--from", dest="from_page", type=int, required=True)
-    ap.add_argument("--to", dest="to_page", type=int, required=True)
-    ap.add_argument("-o", "--out", type=str, required=True)
-    args = ap.parse_args()
-
-    rows, cand, closed = segment_pdf(Path(args.pdf), args.from_page, args.to_page, args.mode)
-
-    out = Path(args.out); out.parent.mkdir(parents=True, exist_ok=True)
-    seen = set()
-    with out.open("w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["headword","entry_text","page","mode"])
-        kept = 0
-        for e in rows:
-            head = norm(e["headword"]); text = norm(e["entry_text"])
-            key = (head, text)
-            if key in seen: continue
-            seen.add(key)
-            w.writerow([head, text, e["page"], args.mode]); kept += 1
-
-    print(f"[{args.mode}] Candidatos: {cand} | Cerradas: {closed} | Guardadas: {kept} → {out}")
-
-if __name__ == "__main__":
-    main()
+# extraer_diccionario_dual.py
+# Uso:
+#   python extraer_diccionario_dual.py shiwilu-dictionary2.pdf --mode shi --from 5 --to 479 -o diccionario_shi_es.csv
+#   python extraer_diccionario_dual.py shiwilu-dictionary2.pdf --mode es  --from 480 --to 1076 -o diccionario_es_shi.csv
+#   (opcional) --workers 8  → reparte el rango en tramos entre procesos; salida idéntica a la serie
+#   (opcional) --cache      → lee las líneas de la caché de páginas (ver cache_paginas.py)
+#   (opcional) --incremental → solo re-segmenta páginas cambiadas (ver extraccion_incremental.py)
+#   (opcional) --perfil perfil.jsonl / --cprofile perfil.prof → tiempos por página (ver instrumentacion.py)
+
+import sys, re, csv, fitz, argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from cache_paginas import CachePaginas, ruta_cache, construir_cache
+from instrumentacion import Perfil, NULO, crear_perfil
+from comun import norm
+from maquetacion import lines_in_reading_order
+from dedup import Vistos
+from modelo_entradas import Entrada
+
+TAG_RE = re.compile(r"\b(vb|vt|vi|adj|adv|nom|prt|s)\.?\b", re.I)
+
+def looks_shiwilu_token(tok: str) -> bool:
+    if not tok: 
+        return False
+    # si empieza con signos/puntuación, NO es headword
+    if tok[0] in "¿¡\"'“”‘’([{•–—-":
+        return False
+    if len(tok) > 40:
+        return False
+    return ("'" in tok or "-" in tok)
+
+def looks_shiwilu_head(line: str) -> bool:
+    L = norm(line).lstrip("* ").strip()
+    if not L: return False
+    first = re.split(r"[\s,;:()]+", L, 1)[0]
+    return looks_shiwilu_token(first)
+
+def looks_spanish_head(line: str) -> bool:
+    L = norm(line).lstrip("* ").strip()
+    if not L: 
+        return False
+    first = re.split(r"[\s,;:()]+", L, 1)[0]
+    if first and first[0] in "¿¡\"'“”‘’([{•–—-":
+        return False
+    if "'" in first:
+        return False
+    return bool(re.match(r"^[A-Za-zÁÉÍÓÚÑáéíóúñ]+(?:[- ][A-Za-zÁÉÍÓÚÑáéíóúñ]+)*$", first))
+
+def extract_headword(header_text: str) -> str:
+    L = norm(header_text).lstrip("* ").strip()
+    for tok in re.split(r"[ ,;:()]", L):
+        t = tok.strip()
+        if looks_shiwilu_token(t): return t
+    return L.split()[0] if L.split() else L
+
+# --- clasificación de cabeceras en una pasada ---
+# Las líneas llegan ya normalizadas (lines_in_reading_order / caché de páginas): solo espacios
+# simples, sin bordes. Sobre eso, la primera "palabra" (tras * y espacios iniciales, hasta
+# , ; : ( ) o espacio) decide casi todas las líneas; TAG_RE solo corre si la primera pasa.
+PRIMERA_RE = re.compile(r"[* ]*([^\s,;:()]*)")
+NO_INICIO = frozenset("¿¡\"'“”‘’([{•–—-")
+ES_PRIMERA_RE = re.compile(r"[A-Za-zÁÉÍÓÚÑáéíóúñ]+(?:-[A-Za-zÁÉÍÓÚÑáéíóúñ]+)*")
+EDITORIAL_RE = re.compile(r"(?i)^(diccionario shiwilu|draft document|national science foundation)$")
+
+def cabecera(ln: str, mode: str):
+    """
+    Si la línea (normalizada) es cabecera de entrada, devuelve su headword; si no, None.
+    Equivale a is_header_line() + extract_headword() de antes (ver verificar_cabeceras.py).
+    """
+    first = PRIMERA_RE.match(ln).group(1)
+    if not first or first[0] in NO_INICIO:
+        return None
+    if mode == "shi":
+        if len(first) > 40 or ("'" not in first and "-" not in first):
+            return None
+    elif not ES_PRIMERA_RE.fullmatch(first):
+        return None
+    # exige etiqueta gramatical en la MISMA línea (primeros 120 caracteres)
+    if not TAG_RE.search(ln, 0, 120):
+        return None
+    if mode == "shi" or ("-" in first and len(first) <= 40):
+        return first   # la primera palabra ya cumple looks_shiwilu_token
+    return extract_headword(ln)
+
+def is_header_line(line: str, mode: str) -> bool:
+    return cabecera(line, mode) is not None
+
+def agregar_linea(cur, ln: str):
+    # acumula fragmentos; el texto se arma una sola vez al cerrar (ver cerrar_entradas)
+    partes = cur.partes
+    # une guiones de fin de línea (palabra- \n siguente)
+    if partes[-1].endswith("-"):
+        partes[-1] = partes[-1][:-1] + ln
+    else:
+        partes.append(ln)
+
+def cerrar_entradas(entries):
+    for e in entries:
+        e.cerrar()
+    return entries
+
+def segmentar_paginas(lineas_de, start: int, end: int, mode: str, perfil=NULO):
+    """
+    Segmenta las páginas start..end (0-based, inclusivo); lineas_de(i) da las líneas de la página i.
+    Devuelve (previas, entries, candidates): `previas` son las líneas (ln, página) anteriores
+    al primer encabezado (continúan la entrada abierta del tramo anterior) y la última
+    de `entries` puede seguir abierta en el tramo siguiente.
+    Cada Entrada (modelo_entradas.py) lleva page (inicio) y page_end (última página que aportó texto).
+    `perfil` (ver instrumentacion.py) recibe el tiempo y los conteos de cada página.
+    """
+    previas, entries, cur = [], [], None
+    candidates = 0
+
+    for i in range(start, end + 1):
+        page_no_human = i + 1
+        with perfil.unidad("pagina", page_no_human):
+            with perfil.medir("pymupdf"):
+                lineas = list(lineas_de(i))
+            with perfil.medir("regex"):
+                cand_antes, editoriales = candidates, 0
+                for ln in lineas:
+
+                    # ignora cabeceras editoriales
+                    if EDITORIAL_RE.match(ln):
+                        editoriales += 1
+                        continue
+
+                    head = cabecera(ln, mode)
+                    if head is not None:
+                        candidates += 1
+                        cur = Entrada(head, page_no_human, page_no_human, [ln])
+                        entries.append(cur)
+                    elif cur:
+                        agregar_linea(cur, ln)
+                        cur.page_end = page_no_human
+                    else:
+                        previas.append((ln, page_no_human))
+            perfil.contar("lineas", len(lineas))
+            perfil.contar("cabecera_ok", candidates - cand_antes)
+            perfil.contar("cabecera_no", len(lineas) - editoriales - (candidates - cand_antes))
+            perfil.contar("editoriales", editoriales)
+
+    return previas, entries, candidates
+
+def abrir_paginas(pdf_path, cache=None):
+    """Devuelve (n_paginas, lineas_de, cerrar) desde la caché (ruta) o directo del PDF."""
+    if cache:
+        c = CachePaginas(cache)
+        return len(c), c.lineas, c.cerrar
+    doc = fitz.open(str(pdf_path))
+    return len(doc), lambda i: lines_in_reading_order(doc[i]), doc.close
+
+def _segmentar_tramo(args):
+    """Worker: abre su propio documento (o caché) y segmenta un tramo de páginas."""
+    pdf_path, start, end, mode, cache, perfilar = args
+    perfil = Perfil() if perfilar else NULO   # se devuelve al padre para fusionarlo
+    _, lineas_de, cerrar = abrir_paginas(pdf_path, cache)
+    try:
+        return segmentar_paginas(lineas_de, start, end, mode, perfil), perfil.exportar()
+    finally:
+        cerrar()
+
+def tramos(start: int, end: int, n: int):
+    """Parte start..end en n tramos contiguos de tamaño parecido."""
+    total = end - start + 1
+    n = max(1, min(n, total))
+    cortes = [start + (total * k) // n for k in range(n + 1)]
+    return [(cortes[k], cortes[k+1] - 1) for k in range(n)]
+
+def coser_tramos(partes):
+    """Une los tramos en orden: las líneas previas de cada tramo continúan la última entrada del anterior."""
+    entries, candidates = [], 0
+    for previas, ents, cand in partes:
+        if entries:
+            for ln, pg in previas:
+                agregar_linea(entries[-1], ln)
+                entries[-1].page_end = pg
+        entries.extend(ents)
+        candidates += cand
+    return entries, candidates
+
+def preparar_cache(pdf_path):
+    cache = ruta_cache(pdf_path)
+    if not cache.exists(): construir_cache(pdf_path, cache)
+    return cache
+
+def rango_paginas(n_pages: int, start_human: int, end_human: int):
+    start = max(0, start_human - 1)
+    end = min(n_pages-1, end_human - 1)
+    if end < start: raise ValueError("Rango de páginas inválido.")
+    return start, end
+
+def segmentar_rango(pdf_path: Path, start: int, end: int, mode: str, workers: int = 1, cache=None, perfil=NULO):
+    """Segmenta start..end (0-based) en serie o por tramos; devuelve (entries, candidates) sin filtrar."""
+    n_pages, lineas_de, cerrar = abrir_paginas(pdf_path, cache)
+    if workers > 1:
+        cerrar()
+        # varios tramos por worker para repartir mejor las páginas lentas
+        trabajos = [(str(pdf_path), a, b, mode, cache, perfil.activo) for a, b in tramos(start, end, workers * 4)]
+        partes = []
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            for parte, datos in ex.map(_segmentar_tramo, trabajos):
+                partes.append(parte)
+                if datos: perfil.fusionar(datos)
+        entries, candidates = coser_tramos(partes)
+    else:
+        try:
+            return segmentar_lineas(lineas_de, start, end, mode, perfil)
+        finally:
+            cerrar()
+    return [e for e in cerrar_entradas(entries) if e.entry_text.strip()], candidates
+
+def segmentar_lineas(lineas_de, start: int, end: int, mode: str, perfil=NULO):
+    """En serie sobre una fuente de líneas ya abierta (caché o PDF; ver pipeline.py)."""
+    entries, candidates = coser_tramos([segmentar_paginas(lineas_de, start, end, mode, perfil)])
+    return [e for e in cerrar_entradas(entries) if e.entry_text.strip()], candidates
+
+def pasa_filtro(e, mode: str) -> bool:
+    # Filtros finales
+    txt = e.entry_text
+    has_tag = bool(TAG_RE.search(txt))
+    if mode == "shi":
+        return has_tag
+    has_shi_token = bool(re.search(r"[A-Za-z0-9]+'[A-Za-z0-9]+", txt))
+    return has_tag and has_shi_token
+
+def segment_pdf(pdf_path: Path, start_human: int, end_human: int, mode: str, workers: int = 1, cache: bool = False,
+                perfil=NULO):
+    cache = preparar_cache(pdf_path) if cache else None
+    n_pages, _, cerrar = abrir_paginas(pdf_path, cache)
+    cerrar()
+    start, end = rango_paginas(n_pages, start_human, end_human)
+
+    entries, candidates = segmentar_rango(pdf_path, start, end, mode, workers, cache, perfil)
+    kept = len(entries)
+    filtered = [e for e in entries if pasa_filtro(e, mode)]
+    return filtered, candidates, kept
+
+def escribir_csv(out: Path, rows, mode: str):
+    """Escribe sin duplicados (head, text). Devuelve (guardadas, fila del CSV de cada entrada)."""
+    out.parent.mkdir(parents=True, exist_ok=True)
+    filas = []
+    with Vistos() as vistos, out.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["headword","entry_text","page","mode"])
+        for e in rows:
+            head = norm(e.headword); text = norm(e.entry_text)
+            nueva, i = vistos.indice(head, text)
+            if nueva:
+                w.writerow([head, text, e.page, mode])
+            filas.append(i)
+        return len(vistos), filas
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("pdf", type=str)
+    ap.add_argument("--mode", choices=["shi","es"], required=True)
+    ap.add_argument("--from", dest="from_page", type=int, required=True)
+    ap.add_argument("--to", dest="to_page", type=int, required=True)
+    ap.add_argument("-o", "--out", type=str, required=True)
+    ap.add_argument("--workers", type=int, default=1, help="procesos en paralelo (por tramos de páginas)")
+    ap.add_argument("--cache", action="store_true", help="leer líneas de la caché de páginas")
+    ap.add_argument("--incremental", action="store_true",
+                    help="re-segmentar solo las páginas que cambiaron (usa la caché y OUT.manifest.json)")
+    ap.add_argument("--perfil", type=str, default=None, help="tiempos y conteos por página en JSON lines")
+    ap.add_argument("--cprofile", type=str, default=None, help="volcado de cProfile del proceso principal")
+    args = ap.parse_args()
+
+    out = Path(args.out)
+    with crear_perfil(args.perfil, args.cprofile) as perfil:
+        if args.incremental:
+            from extraccion_incremental import extraer_incremental
+            extraer_incremental(Path(args.pdf), args.from_page, args.to_page, args.mode, out, args.workers, perfil)
+            return
+
+        rows, cand, closed = segment_pdf(Path(args.pdf), args.from_page, args.to_page, args.mode,
+                                         args.workers, args.cache, perfil)
+        with perfil.medir("io"):
+            kept, _ = escribir_csv(out, rows, args.mode)
+
+        print(f"[{args.mode}] Candidatos: {cand} | Cerradas: {closed} | Guardadas: {kept} → {out}")
+
+if __name__ == "__main__":
+    main()
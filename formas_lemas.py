@@ -0,0 +1,120 @@
+# formas_lemas.py
+# Mapa forma → lema: formas flexionadas e imperativas listadas en la cabecera de cada entrada
+# y referencias cf: / val.: minadas de los CSV extraídos.
+# Uso:
+#   python formas_lemas.py construir formas.tbl diccionario_utf8.csv [diccionario_shi_es.csv ...]
+#   python formas_lemas.py ver formas.tbl "a'anutulli"
+#
+# Cabecera = "lema[, variante...] [(forma[, forma...])] pos." al inicio de la fila (solo SHI→ES), p. ej.
+#   *a'anu'tapalli, a'anutapalli (*a'anu'tulli, a'anutulli) vt. ...
+#   → a'anutapalli, a'anu'tulli, a'anutulli  ⟶  a'anu'tapalli   (tipo "forma")
+# Se usa solo si el headword de la fila es la primera forma (descarta filas mal segmentadas).
+# "cf: X; cf: Y" y "val.: *X" dan X ⟶ headword (tipos "cf" y "val"): remiten a entradas relacionadas.
+# Claves con clave() de almacen_unificado.py (minúscula, sin *, sin número de homónimo); el lema
+# es el headword tal como está en el CSV, en minúscula. Se guarda como tabla mmap (forma, lema, tipo)
+# y se carga en un dict: cada consulta es una búsqueda O(1).
+
+import sys, re, csv, time
+from pathlib import Path
+from tabla_mmap import TablaMmap, escribir_tabla
+from almacen_unificado import clave
+from comun import norm
+
+COLUMNAS = ("forma", "lema", "tipo")
+TIPOS = ("forma", "cf", "val")       # orden de preferencia al resolver
+PAL = r"\*?[^\s,;()*]+"
+# lema[, variante...] [(forma[, forma...])] pos.
+CABECERA_RE = re.compile(rf"({PAL}(?:\s*,\s*{PAL})*)(?:\s*\(\s*({PAL}(?:\s*,\s*{PAL})*)\s*\))?"
+                         rf"\s+(?:vb|vt|vi|adj|adv|nom|prt|s|interj|interrog|post|adpos|conect|conj)\.(?=\s|$)")
+SEP_FORMAS = re.compile(r"[\s,]+")
+REF_RE = re.compile(r"\b(cf|val\.)\s*:\s*([^.;]+)")
+FORMA_RE = re.compile(r"[A-Za-zÁÉÍÓÚÑáéíóúñ]")
+
+def formas_cabecera(texto: str):
+    """Formas (con clave()) de la cabecera; [] si el texto no empieza con una cabecera bien formada."""
+    m = CABECERA_RE.match(texto)
+    if not m: return []
+    return [clave(t) for g in m.groups() if g for t in SEP_FORMAS.split(g) if FORMA_RE.search(t)]
+
+def referencias(texto: str):
+    """[(forma, tipo)] de cada "cf: a, b" / "val.: *c"."""
+    res = []
+    for m in REF_RE.finditer(texto):
+        tipo = "cf" if m.group(1) == "cf" else "val"
+        res.extend((clave(t), tipo) for t in m.group(2).split(",") if FORMA_RE.search(t))
+    return res
+
+def minar(rutas):
+    """{forma: [(lema, tipo), ...]} en orden de aparición, sin repetir."""
+    mapa = {}
+    def agregar(forma, lema, tipo):
+        if forma and forma != clave(lema):
+            pares = mapa.setdefault(forma, [])
+            if (lema, tipo) not in pares: pares.append((lema, tipo))
+    for ruta in rutas:
+        with open(ruta, "r", encoding="utf-8", newline="") as f:
+            rdr = csv.DictReader(f)
+            if "entry_text" not in (rdr.fieldnames or []): continue
+            for row in rdr:
+                if (row.get("mode") or "shi") != "shi": continue
+                lema = norm(row["headword"]).lower()
+                texto = norm(row["entry_text"])
+                formas = formas_cabecera(texto)
+                if formas and formas[0] == clave(lema):
+                    for forma in formas: agregar(forma, lema, "forma")
+                for forma, tipo in referencias(texto):
+                    agregar(forma, lema, tipo)
+    return mapa
+
+def construir(rutas, destino):
+    mapa = minar(rutas)
+    filas = [(forma, lema, tipo) for forma in sorted(mapa) for lema, tipo in mapa[forma]]
+    escribir_tabla(destino, COLUMNAS, filas)
+    return len(mapa), len(filas)
+
+class FormasLemas:
+    def __init__(self, mapa):
+        self.mapa = mapa
+
+    @classmethod
+    def desde_csv(cls, rutas):
+        return cls(minar(rutas))
+
+    @classmethod
+    def cargar(cls, ruta):
+        mapa = {}
+        with TablaMmap(ruta) as t:
+            for i in range(len(t)):
+                forma, lema, tipo = t.fila(i)
+                mapa.setdefault(forma, []).append((lema, tipo))
+        return cls(mapa)
+
+    def __len__(self):
+        return len(self.mapa)
+
+    def resolver(self, forma: str, tipos=TIPOS):
+        """Lemas de la forma: [(lema, tipo)], primero las formas flexionadas, luego cf/val."""
+        pares = self.mapa.get(clave(forma), ())
+        return [p for t in tipos for p in pares if p[1] == t]
+
+def main():
+    if len(sys.argv) < 4 or sys.argv[1] not in ("construir", "ver"):
+        print('Uso: python formas_lemas.py construir formas.tbl A.csv [B.csv ...]')
+        print('     python formas_lemas.py ver formas.tbl "forma"')
+        sys.exit(1)
+    ruta = Path(sys.argv[2])
+    if sys.argv[1] == "construir":
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        n_formas, n_filas = construir(sys.argv[3:], ruta)
+        print(f"OK: {n_formas} formas → {n_filas} pares forma-lema → {ruta} ({ruta.stat().st_size} bytes)")
+        return
+    formas = FormasLemas.cargar(ruta)
+    t0 = time.perf_counter()
+    res = formas.resolver(sys.argv[3])
+    dt = (time.perf_counter() - t0) * 1e6
+    for lema, tipo in res:
+        print(f"{tipo}\t{lema}")
+    print(f"{len(res)} lemas en {dt:.1f} µs ({len(formas)} formas cargadas)")
+
+if __name__ == "__main__":
+    main()
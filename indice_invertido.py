@@ -0,0 +1,179 @@
+# indice_invertido.py
+# Índice invertido (token → lista de documentos) sobre los CSV del diccionario.
+# Se guarda como dos tablas mmap (ver tabla_mmap.py): los workers lo abren sin parsear.
+# El vocabulario lleva además una clave CABEZA + headword (minúscula) → documentos con ese
+# headword: buscar() ordena las coincidencias exactas sin decodificar registros.
+# Uso:
+#   python indice_invertido.py construir indice.idx diccionario_utf8.csv diccionario_shi_es.csv diccionario_es_shi.csv
+#   python indice_invertido.py buscar indice.idx "a'cha"
+
+import sys, re, time, heapq
+from pathlib import Path
+from tabla_mmap import TablaMmap, escribir_tabla
+from comun import norm
+from limpiar_entradas_v2 import open_csv_any
+
+CAMPOS = ("headword", "entry_text", "gloss_es", "examples_shi", "examples_es")
+TOKEN_RE = re.compile(r"[0-9A-Za-zÁÉÍÓÚÜÑáéíóúüñ'\-]+")
+CABEZA = "\x00"   # prefijo de las claves headword → docs (ningún token lo contiene; ordena primero)
+
+def tokenizar(s: str):
+    """Tokens en minúscula; conserva apóstrofos y guiones internos (a'cha, kuku'yu'-wanan)."""
+    for m in TOKEN_RE.finditer(norm(s).lower()):
+        t = m.group(0).strip("-").lstrip("'")
+        if t: yield t
+
+# --- codificación compacta de postings: deltas en varint ---
+
+def varint_delta(ids):
+    out, prev = bytearray(), 0
+    for d in ids:
+        v = d - prev; prev = d
+        while v >= 0x80:
+            out.append((v & 0x7F) | 0x80); v >>= 7
+        out.append(v)
+    return bytes(out)
+
+def leer_varint_delta(buf, ini: int, fin: int):
+    ids, prev, v, shift = [], 0, 0, 0
+    for i in range(ini, fin):
+        b = buf[i]
+        v |= (b & 0x7F) << shift
+        if b & 0x80:
+            shift += 7
+            continue
+        prev += v; ids.append(prev)
+        v = shift = 0
+    return ids
+
+COLS_VOCAB = ("token", "postings")
+COLS_DOCS = ("fuente", "fila", "page") + CAMPOS
+
+def ruta_docs(ruta) -> Path:
+    return Path(ruta).with_suffix(".docs")
+
+def construir(rutas, destino):
+    """
+    Indexa los CSV y guarda dos tablas mmap: `destino` (token → postings, ordenado)
+    y `destino.docs` (un registro por fila con los campos indexados).
+    """
+    docs, listas, cabezas = [], {}, {}
+    for ruta in rutas:
+        ruta = Path(ruta)
+        f, rdr, _ = open_csv_any(ruta)
+        with f:
+            campos = [c for c in CAMPOS if c in (rdr.fieldnames or [])]
+            if "headword" not in campos:
+                raise KeyError(f"Falta columna: headword ({ruta})")
+            for fila, row in enumerate(rdr):
+                doc = len(docs)
+                page = row.get("page") or "0"
+                docs.append([ruta.stem, fila, int(page) if page.isdigit() else 0]
+                            + [norm(row.get(c)) for c in CAMPOS])
+                cabezas.setdefault(CABEZA + docs[-1][3].lower(), []).append(doc)
+                vistos = set()
+                for c in campos:
+                    vistos.update(tokenizar(row[c]))
+                for t in vistos:
+                    listas.setdefault(t, []).append(doc)
+
+    destino = Path(destino)
+    n_tokens = len(listas)
+    listas.update(cabezas)
+    escribir_tabla(destino, COLS_VOCAB, ((t, varint_delta(listas[t])) for t in sorted(listas)))
+    escribir_tabla(ruta_docs(destino), COLS_DOCS, docs)
+    return len(docs), n_tokens
+
+class IndiceInvertido:
+    """
+    Índice abierto con mmap: el vocabulario se busca por bisección sobre la tabla
+    ordenada y los registros se leen celda a celda; no se materializa nada al abrir.
+    """
+    def __init__(self, vocab: TablaMmap, docs: TablaMmap):
+        self.vocab = vocab
+        self.docs = docs
+
+    @classmethod
+    def cargar(cls, ruta):
+        return cls(TablaMmap(ruta), TablaMmap(ruta_docs(ruta)))
+
+    def cerrar(self):
+        self.vocab.cerrar(); self.docs.cerrar()
+
+    # --- consulta ---
+
+    def _buscar_token(self, token: str):
+        lo, hi = 0, len(self.vocab)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            t = self.vocab.celda(mid, 0)
+            if t < token: lo = mid + 1
+            elif t > token: hi = mid
+            else: return mid
+        return None
+
+    def postings_de(self, token: str):
+        i = self._buscar_token(token)
+        if i is None: return []
+        b = self.vocab.celda_bytes(i, 1)
+        return leer_varint_delta(b, 0, len(b))
+
+    def buscar(self, consulta: str, limite: int = 50):
+        """
+        Conjunción (AND) de los tokens de la consulta.
+        Primero los documentos cuyo headword coincide con la consulta, luego en orden de archivo.
+        """
+        toks = list(dict.fromkeys(tokenizar(consulta)))
+        if not toks: return []
+        listas = []
+        for t in toks:
+            i = self._buscar_token(t)
+            if i is None: return []
+            listas.append(self.vocab.celda_bytes(i, 1))
+        listas.sort(key=len)  # la más corta primero
+        hits = set(leer_varint_delta(listas[0], 0, len(listas[0])))
+        for b in listas[1:]:
+            if not hits: break
+            hits.intersection_update(leer_varint_delta(b, 0, len(b)))
+
+        # headword exacto primero (clave CABEZA del vocabulario), luego el resto por nº de documento;
+        # solo se decodifican los `limite` documentos devueltos
+        orden = [d for d in self.postings_de(CABEZA + norm(consulta).lower()) if d in hits][:limite]
+        if len(orden) < limite:
+            orden += heapq.nsmallest(limite - len(orden), hits.difference(orden))
+        return [self.doc(d) for d in orden]
+
+    def doc(self, d: int):
+        t = self.docs
+        return {"fuente": t.celda(d, 0), "fila": int(t.celda(d, 1)),
+                "headword": t.celda(d, 3), "page": int(t.celda(d, 2))}
+
+    def registro(self, d: int):
+        """Todos los campos indexados del documento d (fila y página como int, igual que doc())."""
+        r = dict(zip(COLS_DOCS, self.docs.fila(d)))
+        r["fila"], r["page"] = int(r["fila"]), int(r["page"])
+        return r
+
+def main():
+    if len(sys.argv) < 4 or sys.argv[1] not in ("construir", "buscar"):
+        print('Uso: python indice_invertido.py construir indice.idx A.csv [B.csv ...]')
+        print('     python indice_invertido.py buscar indice.idx "consulta"')
+        sys.exit(1)
+    cmd, ruta = sys.argv[1], Path(sys.argv[2])
+
+    if cmd == "construir":
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        n_docs, n_tokens = construir(sys.argv[3:], ruta)
+        tam = ruta.stat().st_size + ruta_docs(ruta).stat().st_size
+        print(f"OK: {n_docs} documentos, {n_tokens} tokens → {ruta} (+ {ruta_docs(ruta).name}, {tam} bytes)")
+    else:
+        idx = IndiceInvertido.cargar(ruta)
+        t0 = time.perf_counter()
+        res = idx.buscar(" ".join(sys.argv[3:]))
+        dt = (time.perf_counter() - t0) * 1000
+        for r in res:
+            print(f"{r['fuente']}:{r['fila']}\tp.{r['page']}\t{r['headword']}")
+        print(f"{len(res)} resultados en {dt:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# instrumentacion.py
+# Perfilado por etapa compartido por extraer_diccionario_dual.py, extraer_es_shi.py y limpiar_entradas_v2.py.
+# Uso (en cualquiera de los tres):
+#   ... --perfil perfil.jsonl        → una línea JSON por unidad (página o fila) + una de resumen
+#   ... --cprofile perfil.prof       → volcado de cProfile (ver con: python -m pstats perfil.prof)
+#
+# Cada unidad registra su tiempo total y el desglose por categoría:
+#   pymupdf  leer las líneas de la página (PyMuPDF, o la caché de páginas con --cache)
+#   regex    clasificar líneas / limpiar filas (is_header_line, HDR_SECOND, process_row)
+#   io       leer y escribir CSV
+# más contadores (cabeceras aceptadas/rechazadas, líneas descartadas, ...).
+# Con --workers los tiempos por categoría suman los de todos los procesos (pueden superar a "total");
+# cProfile solo cubre el proceso principal.
+# Sin esas opciones se usa NULO: mismos métodos, sin costo más allá de la llamada.
+
+import json, time, cProfile
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+MAS_LENTAS = 10
+
+class Perfil:
+    activo = True
+
+    def __init__(self, ruta_jsonl=None, ruta_cprofile=None):
+        self.ruta_jsonl, self.ruta_cprofile = ruta_jsonl, ruta_cprofile
+        self.unidades = []            # [{"unidad", "id", "ms", "<categoría>_ms", ...}]
+        self.tiempos = Counter()      # categoría → segundos (total)
+        self.contadores = Counter()
+        self._actual = None
+        self._prof = None
+        self._t0 = None
+
+    # --- uso como contexto de toda la corrida ---
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        if self.ruta_cprofile:
+            self._prof = cProfile.Profile(); self._prof.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self._prof:
+            self._prof.disable(); self._prof.dump_stats(self.ruta_cprofile)
+        self.tiempos["total"] += time.perf_counter() - self._t0
+        self.escribir()
+
+    # --- medición ---
+
+    @contextmanager
+    def unidad(self, tipo: str, ident):
+        """Una página o fila: su tiempo total más lo que midan medir()/contar() dentro."""
+        reg = {"unidad": tipo, "id": ident}
+        previo, self._actual = self._actual, reg
+        t0 = time.perf_counter()
+        try:
+            yield reg
+        finally:
+            reg["ms"] = round((time.perf_counter() - t0) * 1000, 3)
+            self._actual = previo
+            self.unidades.append(reg)
+
+    @contextmanager
+    def medir(self, categoria: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            self.tiempos[categoria] += dt
+            if self._actual is not None:
+                k = categoria + "_ms"
+                self._actual[k] = round(self._actual.get(k, 0) + dt * 1000, 3)
+
+    def contar(self, nombre: str, n: int = 1):
+        if not n: return
+        self.contadores[nombre] += n
+        if self._actual is not None:
+            self._actual[nombre] = self._actual.get(nombre, 0) + n
+
+    # --- procesos hijos (--workers) ---
+
+    def exportar(self):
+        return {"unidades": self.unidades, "tiempos": dict(self.tiempos), "contadores": dict(self.contadores)}
+
+    def fusionar(self, datos):
+        self.unidades.extend(datos["unidades"])
+        self.tiempos.update(datos["tiempos"])
+        self.contadores.update(datos["contadores"])
+
+    # --- salida ---
+
+    def resumen(self):
+        lentas = sorted(self.unidades, key=lambda u: -u["ms"])[:MAS_LENTAS]
+        return {"unidad": "resumen", "n": len(self.unidades),
+                "tiempos_s": {k: round(v, 4) for k, v in sorted(self.tiempos.items())},
+                "contadores": dict(sorted(self.contadores.items())),
+                "mas_lentas": [{"unidad": u["unidad"], "id": u["id"], "ms": u["ms"]} for u in lentas]}
+
+    def escribir(self):
+        res = self.resumen()
+        if self.ruta_jsonl:
+            with open(self.ruta_jsonl, "w", encoding="utf-8") as f:
+                for u in self.unidades:   # en orden de proceso (páginas/filas en orden)
+                    f.write(json.dumps(u, ensure_ascii=False) + "\n")
+                f.write(json.dumps(res, ensure_ascii=False) + "\n")
+        t = " | ".join(f"{k} {v:.2f} s" for k, v in res["tiempos_s"].items())
+        lentas = ", ".join(f"{u['id']} ({u['ms']:.1f} ms)" for u in res["mas_lentas"][:3])
+        destino = " → " + ", ".join(str(r) for r in (self.ruta_jsonl, self.ruta_cprofile) if r)
+        print(f"Perfil: {res['n']} unidades | {t} | más lentas: {lentas}{destino}")
+
+class PerfilNulo:
+    """Misma interfaz que Perfil, sin registrar nada."""
+    activo = False
+    _nulo = nullcontext()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): pass
+    def unidad(self, tipo, ident): return self._nulo
+    def medir(self, categoria): return self._nulo
+    def contar(self, nombre, n=1): pass
+    def exportar(self): return None
+    def fusionar(self, datos): pass
+
+NULO = PerfilNulo()
+
+def crear_perfil(ruta_jsonl=None, ruta_cprofile=None):
+    if not (ruta_jsonl or ruta_cprofile):
+        return NULO
+    return Perfil(ruta_jsonl, ruta_cprofile)
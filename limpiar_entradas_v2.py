@@ -1,199 +1,298 @@
-# limpiar_entradas_v2.py
-import sys, re, csv
-from pathlib import Path
-
-ABBR = ("vb.", "vt.", "vi.", "adj.", "adv.", "nom.", "prt.", "s.")
-ABBR_RE = re.compile(r"\b(" + "|".join(re.escape(x) for x in ABBR) + r")\b", re.I)
-
-# Ruido y metadatos del diccionario
-NOISE_PAT = re.compile(
-    r"(?i)\b(?:cf:|val\.?:|clf:|comp\.?\s+of|nprop\.?|hom:|superlatat:|pi\d|mek\d|nan\.?|dan\.?|dek\d|pi\b|nan\b|dan\b)\b"
-)
-# tokens raros de OCR / residuos
-TRASH = re.compile(r'["“”]{1,}|!{1,}|^\W+$|^\d{1,4}\s*$')
-
-SPAN_COMMON = r"\b(el|la|los|las|un|una|unos|unas|de|del|y|o|que|como|para|con|sin|por|sobre|entre|cuando|donde|quien|quién|cómo|cuándo|dónde|yo|tú|usted|él|ella|ellos|ellas|esto|eso|estos|esas|aquí|allí|ayer|hoy|mañana|porque|pero|también)\b"
-
-def norm(s: str) -> str:
-    s = s.replace("’","'").replace("ʼ","'")
-    s = re.sub(r"\s+", " ", s.strip())
-    return s
-
-def split_header(entry_text: str):
-    """Devuelve (pos_tag, body_desde_etiqueta). Si no halla etiqueta, body = texto normalizado."""
-    t = norm(entry_text)
-    m = ABBR_RE.search(t)
-    if not m:
-        return ("", t)
-    pos = m.group(1).lower().rstrip(".")
-    return (pos, t[m.start():])
-
-def clean_noise(s: str) -> str:
-    s = NOISE_PAT.sub("", s)
-    s = re.sub(r"\(\s*\)", "", s)
-    s = re.sub(r"\s{2,}", " ", s).strip(" ,;:")
-    return s
-
-def is_spanish(s: str) -> bool:
-    if re.search(r"[áéíóúñÁÉÍÓÚÑ¿¡]", s):
-        return True
-    if re.search(SPAN_COMMON, s, re.I):
-        return True
-    # tiene dígitos/medidas y pocas comillas → suele ser ES
-    if re.search(r"\d", s) and s.count("'") < 2:
-        return True
-    return False
-
-def is_shiwilu(s: str) -> bool:
-    # ≥2 apóstrofos y sin signos españoles
-    return (s.count("'") >= 2) and ("¿" not in s and "¡" not in s)
-
-def split_units(text: str):
-    """
-    Divide el body en unidades:
-    - primero por ' || ' si existe,
-    - si no, por oraciones aproximadas.
-    """
-    if "||" in text:
-        parts = [norm(x) for x in text.split("||")]
-    else:
-        parts = re.split(r"(?<=[\.\?\!])\s+(?=[A-ZÁÉÍÓÚÑ¿¡])", text)
-        if len(parts) == 1:
-            parts = re.split(r"\s*(?<=\.)\s*", text)
-    # limpia residuos
-    out = []
-    for p in parts:
-        p = norm(p)
-        if not p or TRASH.match(p):
-            continue
-        out.append(p)
-    return out
-
-def strip_headword_echo(text: str, head: str) -> str:
-    """Quita repeticiones tipo 'headword 478 ! !' al inicio."""
-    t = text
-    # borra headword suelto + números/puntuación pegados
-    t = re.sub(rf"^{re.escape(head)}\b[\s\d\W]*", "", t, flags=re.I)
-    return norm(t)
-
-def extract_senses(body: str):
-    """Devuelve lista de sentidos en ES detectando '1) ... 2) ...' """
-    senses = []
-    # normaliza numeradores 1) 2)
-    chunks = re.split(r"\s(?=\d\))", body)
-    for ch in chunks:
-        c = clean_noise(norm(ch))
-        if len(c) > 1:
-            senses.append(c)
-    return senses if len(senses) > 1 else []
-
-def process_row(row, cols):
-    head = norm(row[cols["headword"]])
-    raw  = norm(row[cols["entry_text"]])
-    page = row.get(cols["page"], "") if cols["page"] else ""
-
-    # 1) cortar hasta la etiqueta y extraer POS
-    pos, body = split_header(raw)
-    # quitar eco de headword al inicio si aparece
-    body = strip_headword_echo(body, head)
-    body = clean_noise(body)
-
-    # 2) si hay sentidos numerados, construye gloss desde ellos
-    senses = extract_senses(body)
-    units = split_units(body)
-
-    es_units, shi_units = [], []
-    for u in units:
-        u_clean = clean_noise(u)
-        if not u_clean:
-            continue
-        if is_shiwilu(u_clean) and not is_spanish(u_clean):
-            shi_units.append(u_clean)
-        elif is_spanish(u_clean):
-            es_units.append(u_clean)
-        else:
-            # ambiguos: decide por número de apóstrofos
-            (shi_units if u_clean.count("'") >= 2 else es_units).append(u_clean)
-
-    # 3) gloss_es: prioriza sentidos numerados; si no, usa ES units
-    if senses:
-        gloss_es = " ".join([s for s in senses if is_spanish(s)])
-    else:
-        gloss_es = " ".join(es_units)
-
-    # 4) ejemplos: mantenlos separados
-    examples_shi = " || ".join(shi_units)
-    examples_es  = " || ".join([e for e in es_units if e not in senses])  # excluye definiciones si ya fueron a gloss
-
-    return {
-        "headword": head,
-        "pos": pos,
-        "gloss_es": gloss_es.strip(" ."),
-        "examples_shi": examples_shi,
-        "examples_es": examples_es,
-        "page": page
-    }, shi_units, [e for e in es_units if e not in senses]
-
-def align_pairs(shi_list, es_list):
-    n = min(len(shi_list), len(es_list))
-    return [(shi_list[i], es_list[i]) for i in range(n)]
-
-def open_csv_any(path: Path):
-    for enc in ("utf-8", "utf-8-sig", "latin-1"):
-        try:
-            f = path.open("r", encoding=enc, newline="")
-            rdr = csv.DictReader(f)
-            hdrs = [h.strip() for h in rdr.fieldnames] if rdr.fieldnames else []
-            return f, rdr, hdrs
-        except UnicodeDecodeError:
-            continue
-    raise RuntimeError("No se pudo abrir el CSV (convierte a UTF-8).")
-
-def expect_cols(hdrs):
-    m = {h.lower(): h for h in hdrs}
-    need = {}
-    for k in ("headword","entry_text","page"):
-        need[k] = m.get(k) if k in m else (None if k=="page" else (_ for _ in ()).throw(KeyError(f"Falta columna: {k}")))
-    return need
-
-def main():
-    if len(sys.argv) < 3:
-        print('Uso: python limpiar_entradas_v2.py "diccionario_utf8.csv" "diccionario_limpio.csv"')
-        sys.exit(1)
-    inp = Path(sys.argv[1]); out = Path(sys.argv[2])
-    out_pairs = out.with_suffix(".pairs.tsv")
-
-    f, rdr, hdrs = open_csv_any(inp)
-    try:
-        cols = expect_cols(hdrs)
-        cleaned, all_pairs, seen = [], [], set()
-        for row in rdr:
-            c, shi_list, es_list = process_row(row, cols)
-            key = (c["headword"], c["gloss_es"], c["page"])
-            if key in seen: 
-                continue
-            seen.add(key)
-            cleaned.append(c)
-            for s,e in align_pairs(shi_list, es_list):
-                all_pairs.append((c["headword"], s, e, c["page"]))
-
-        out.parent.mkdir(parents=True, exist_ok=True)
-        with out.open("w", newline="", encoding="utf-8") as fo:
-            w = csv.DictWriter(fo, fieldnames=["headword","pos","gloss_es","examples_shi","examples_es","page"])
-            w.writeheader()
-            for c in cleaned:
-                w.writerow(c)
-
-        if all_pairs:
-            with out_pairs.open("w", encoding="utf-8", newline="") as fp:
-                fp.write("headword\tshi\tes\tpage\n")
-                for hw, shi, es, pg in all_pairs:
-                    fp.write(f"{hw}\t{shi}\t{es}\t{pg}\n")
-
-        print(f"OK: {len(cleaned)} filas → {out}")
-        print(f"Pares paralelos: {len(all_pairs)} → {out_pairs}")
-    finally:
-        f.close()
-
-if __name__ == "__main__":
-    main()
+# limpiar_entradas_v2.py
+# Uso:
+#   python limpiar_entradas_v2.py diccionario_utf8.csv diccionario_limpio.csv [--jobs 8] [--chunk 256]
+#   (opcional) --perfil perfil.jsonl / --cprofile perfil.prof → tiempos por fila (ver instrumentacion.py)
+#   Pares shi–es alineados → diccionario_limpio.pairs.tsv (para consultarlos: corpus_paralelo.py)
+import sys, re, csv, codecs
+from pathlib import Path
+from functools import lru_cache, partial
+from multiprocessing import Pool
+from collections import namedtuple
+from instrumentacion import NULO, crear_perfil
+from comun import norm, arg
+from dedup import Vistos
+from modelo_entradas import FilaLimpia, pos_interna, pagina
+
+ABBR = ("vb.", "vt.", "vi.", "adj.", "adv.", "nom.", "prt.", "s.")
+ABBR_RE = re.compile(r"\b(" + "|".join(re.escape(x) for x in ABBR) + r")\b", re.I)
+
+# Ruido y metadatos del diccionario
+NOISE_PAT = re.compile(
+    r"(?i)\b(?:cf:|val\.?:|clf:|comp\.?\s+of|nprop\.?|hom:|superlatat:|pi\d|mek\d|nan\.?|dan\.?|dek\d|pi\b|nan\b|dan\b)\b"
+)
+# tokens raros de OCR / residuos
+TRASH = re.compile(r'["“”]{1,}|!{1,}|^\W+$|^\d{1,4}\s*$')
+
+SPAN_COMMON = r"\b(el|la|los|las|un|una|unos|unas|de|del|y|o|que|como|para|con|sin|por|sobre|entre|cuando|donde|quien|quién|cómo|cuándo|dónde|yo|tú|usted|él|ella|ellos|ellas|esto|eso|estos|esas|aquí|allí|ayer|hoy|mañana|porque|pero|también)\b"
+
+SPAN_COMMON_RE = re.compile(SPAN_COMMON, re.I)
+ACENTOS = frozenset("áéíóúñÁÉÍÓÚÑ")
+INVERTIDOS = frozenset("¿¡")
+PAREN_VACIO = re.compile(r"\(\s*\)")
+ESPACIOS = re.compile(r"\s{2,}")
+LOTE_PARES = 256   # filas por llamada a alinear_lote()
+CODIFICACIONES = ("utf-8-sig", "cp1252", "latin-1")   # utf-8-sig también lee UTF-8 sin BOM
+ECO_COLA = re.compile(r"[\s\d\W]*")
+DIGITO = re.compile(r"\d")
+
+Rasgos = namedtuple("Rasgos", "acento comun apostrofos digito invertido")
+
+def split_header(entry_text: str):
+    """Devuelve (pos_tag, body_desde_etiqueta). Si no halla etiqueta, body = texto normalizado."""
+    t = norm(entry_text)
+    m = ABBR_RE.search(t)
+    if not m:
+        return ("", t)
+    pos = pos_interna(m.group(1).lower().rstrip("."))
+    return (pos, t[m.start():])
+
+@lru_cache(maxsize=1 << 16)
+def clean_noise(s: str) -> str:
+    s = NOISE_PAT.sub("", s)
+    s = PAREN_VACIO.sub("", s)
+    s = ESPACIOS.sub(" ", s).strip(" ,;:")
+    return s
+
+@lru_cache(maxsize=1 << 16)
+def rasgos(s: str) -> Rasgos:
+    """
+    Todos los rasgos de la unidad de una vez: un recorrido de caracteres (set) da acentos,
+    y ¿¡; búsquedas compiladas dan palabras comunes y dígitos; count() los apóstrofos.
+    """
+    chars = set(s)
+    return Rasgos(
+        not ACENTOS.isdisjoint(chars),
+        SPAN_COMMON_RE.search(s) is not None,
+        s.count("'"),
+        DIGITO.search(s) is not None,
+        not INVERTIDOS.isdisjoint(chars),
+    )
+
+def _es_spanish(r: Rasgos) -> bool:
+    # acentos/¿¡ o palabras comunes; o dígitos/medidas con pocas comillas → suele ser ES
+    return r.acento or r.invertido or r.comun or (r.digito and r.apostrofos < 2)
+
+def _es_shiwilu(r: Rasgos) -> bool:
+    # ≥2 apóstrofos y sin signos españoles
+    return r.apostrofos >= 2 and not r.invertido
+
+def is_spanish(s: str) -> bool:
+    return _es_spanish(rasgos(s))
+
+def is_shiwilu(s: str) -> bool:
+    return _es_shiwilu(rasgos(s))
+
+def clasificar(u: str) -> str:
+    """'shi' o 'es' para una unidad ya limpia, con un solo cálculo de rasgos."""
+    r = rasgos(u)
+    es = _es_spanish(r)
+    if _es_shiwilu(r) and not es:
+        return "shi"
+    if es:
+        return "es"
+    # ambiguos: decide por número de apóstrofos
+    return "shi" if r.apostrofos >= 2 else "es"
+
+def split_units(text: str):
+    """
+    Divide el body en unidades:
+    - primero por ' || ' si existe,
+    - si no, por oraciones aproximadas.
+    """
+    if "||" in text:
+        parts = [norm(x) for x in text.split("||")]
+    else:
+        parts = re.split(r"(?<=[\.\?\!])\s+(?=[A-ZÁÉÍÓÚÑ¿¡])", text)
+        if len(parts) == 1:
+            parts = re.split(r"\s*(?<=\.)\s*", text)
+    # limpia residuos
+    out = []
+    for p in parts:
+        p = norm(p)
+        if not p or TRASH.match(p):
+            continue
+        out.append(p)
+    return out
+
+def strip_headword_echo(text: str, head: str) -> str:
+    """Quita repeticiones tipo 'headword 478 ! !' al inicio."""
+    t = text
+    n = len(head)
+    # borra headword suelto + números/puntuación pegados; equivale a
+    # re.sub(rf"^{re.escape(head)}\b[\s\d\W]*", "", t, flags=re.I) sin compilar un regex por fila
+    if len(t) >= n and t[:n].lower() == head.lower():
+        antes = _es_w(t[n-1]) if n else False
+        if antes != (len(t) > n and _es_w(t[n])):   # \b tras el headword
+            t = t[ECO_COLA.match(t, n).end():]
+    return norm(t)
+
+def _es_w(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+def extract_senses(body: str):
+    """Devuelve lista de sentidos en ES detectando '1) ... 2) ...' """
+    senses = []
+    # normaliza numeradores 1) 2)
+    chunks = re.split(r"\s(?=\d\))", body)
+    for ch in chunks:
+        c = clean_noise(norm(ch))
+        if len(c) > 1:
+            senses.append(c)
+    return senses if len(senses) > 1 else []
+
+def process_row(row, cols):
+    head = norm(row[cols["headword"]])
+    raw  = norm(row[cols["entry_text"]])
+    page = row.get(cols["page"], "") if cols["page"] else ""
+
+    # 1) cortar hasta la etiqueta y extraer POS
+    pos, body = split_header(raw)
+    # quitar eco de headword al inicio si aparece
+    body = strip_headword_echo(body, head)
+    body = clean_noise(body)
+
+    # 2) si hay sentidos numerados, construye gloss desde ellos
+    senses = extract_senses(body)
+    units = split_units(body)
+
+    es_units, shi_units = [], []
+    for u in units:
+        u_clean = clean_noise(u)
+        if not u_clean:
+            continue
+        (shi_units if clasificar(u_clean) == "shi" else es_units).append(u_clean)
+
+    # 3) gloss_es: prioriza sentidos numerados; si no, usa ES units
+    if senses:
+        gloss_es = " ".join([s for s in senses if is_spanish(s)])
+    else:
+        gloss_es = " ".join(es_units)
+
+    # 4) ejemplos: mantenlos separados
+    examples_shi = " || ".join(shi_units)
+    examples_es  = " || ".join([e for e in es_units if e not in senses])  # excluye definiciones si ya fueron a gloss
+
+    return FilaLimpia(head, pos, gloss_es.strip(" ."), examples_shi, examples_es,
+                      pagina(page)), shi_units, [e for e in es_units if e not in senses]
+
+def align_pairs(shi_list, es_list):
+    """Pares (shi, es) de una entrada por largo y anclas (ver corpus_paralelo.py)."""
+    from corpus_paralelo import alinear_lote   # NumPy solo al alinear
+    return [(shi, es) for shi, es, _ in alinear_lote([(shi_list, es_list)])[0]]
+
+def codificacion(path: Path) -> str:
+    """Primera de CODIFICACIONES que decodifica el archivo entero (por bloques, sin cargarlo)."""
+    for enc in CODIFICACIONES:
+        dec = codecs.getincrementaldecoder(enc)()
+        try:
+            with path.open("rb") as f:
+                for bloque in iter(lambda: f.read(1 << 20), b""):
+                    dec.decode(bloque)
+            dec.decode(b"", final=True)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    raise RuntimeError("No se pudo abrir el CSV (convierte a UTF-8).")
+
+def open_csv_any(path: Path):
+    """(archivo, DictReader, cabeceras) con la codificación que decodifica todo el archivo; sin BOM."""
+    f = Path(path).open("r", encoding=codificacion(Path(path)), newline="")
+    rdr = csv.DictReader(f)
+    hdrs = [h.strip() for h in rdr.fieldnames] if rdr.fieldnames else []
+    return f, rdr, hdrs
+
+def expect_cols(hdrs):
+    m = {h.lower(): h for h in hdrs}
+    need = {}
+    for k in ("headword","entry_text","page"):
+        need[k] = m.get(k) if k in m else (None if k=="page" else (_ for _ in ()).throw(KeyError(f"Falta columna: {k}")))
+    return need
+
+def procesar(rdr, cols, jobs: int = 1, chunk: int = 256, perfil=NULO):
+    """
+    process_row sobre todas las filas, en orden. Con jobs > 1 reparte lotes de `chunk`
+    filas en un pool de procesos (imap conserva el orden de entrada); en ese caso el
+    perfil no tiene tiempos por fila.
+    """
+    if jobs <= 1:
+        filas = iter(rdr)
+        while True:
+            with perfil.medir("io"):
+                row = next(filas, None)
+            if row is None: return
+            with perfil.unidad("fila", row.get(cols["headword"])), perfil.medir("regex"):
+                res = process_row(row, cols)
+            yield res
+    with Pool(jobs) as pool:
+        yield from pool.imap(partial(process_row, cols=cols), rdr, chunksize=chunk)
+
+def limpiar_filas(rdr, cols, stats, jobs: int = 1, chunk: int = 256, perfil=NULO):
+    """
+    Genera (fila limpia, pares) en orden, descartando duplicados (headword, gloss_es, page).
+    Los pares se alinean por lotes de LOTE_PARES filas (una sola pasada de alinear_lote).
+    """
+    from corpus_paralelo import alinear_lote   # NumPy solo al alinear
+    pendientes = []
+    def alinear():
+        pares = alinear_lote([(shi, es) for _, shi, es in pendientes])
+        for (c, _, _), p in zip(pendientes, pares):
+            yield c, [(shi, es) for shi, es, _ in p]
+        pendientes.clear()
+    with Vistos() as vistos:   # el dedup es global: se hace aquí, en el proceso principal
+        for c, shi_list, es_list in procesar(rdr, cols, jobs, chunk, perfil):
+            perfil.contar("unidades_shi", len(shi_list))
+            perfil.contar("unidades_es", len(es_list))
+            if not vistos.agregar(c.headword, c.gloss_es, c.page):
+                perfil.contar("duplicadas")
+                continue
+            stats["filas"] += 1
+            pendientes.append((c, shi_list, es_list))
+            if len(pendientes) >= LOTE_PARES:
+                yield from alinear()
+        yield from alinear()
+
+def escribir_limpio(out: Path, rdr, cols, jobs: int = 1, chunk: int = 256, perfil=NULO):
+    """
+    Limpia las filas de `rdr` (dicts como los de csv.DictReader) → `out` y los pares alineados
+    → out.pairs.tsv. Devuelve {"filas", "pares"}.
+    """
+    out_pairs = out.with_suffix(".pairs.tsv")
+    stats = {"filas": 0, "pares": 0}
+    fp = None   # el .pairs.tsv se abre con el primer par (no se crea si no hay pares)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with out.open("w", newline="", encoding="utf-8") as fo:
+            w = csv.writer(fo)
+            w.writerow(FilaLimpia.CAMPOS)
+            for c, pares in limpiar_filas(rdr, cols, stats, jobs, chunk, perfil):
+                with perfil.medir("io"):
+                    w.writerow(c.fila())
+                    if pares and fp is None:
+                        fp = out_pairs.open("w", encoding="utf-8", newline="")
+                        fp.write("headword\tshi\tes\tpage\n")
+                    for shi, es in pares:
+                        fp.write(f"{c.headword}\t{shi}\t{es}\t{c.page}\n")
+                stats["pares"] += len(pares)
+    finally:
+        if fp: fp.close()
+    perfil.contar("filas", stats["filas"])
+    perfil.contar("pares", stats["pares"])
+    return stats
+
+def main():
+    if len(sys.argv) < 3:
+        print('Uso: python limpiar_entradas_v2.py "diccionario_utf8.csv" "diccionario_limpio.csv" [--jobs N] [--chunk 256] [--perfil p.jsonl] [--cprofile p.prof]')
+        sys.exit(1)
+    inp = Path(sys.argv[1]); out = Path(sys.argv[2])
+    jobs = int(arg("--jobs", "1")); chunk = int(arg("--chunk", "256"))
+
+    f, rdr, hdrs = open_csv_any(inp)
+    with f:
+        cols = expect_cols(hdrs)
+        with crear_perfil(arg("--perfil", None), arg("--cprofile", None)) as perfil:
+            stats = escribir_limpio(out, rdr, cols, jobs, chunk, perfil)
+            print(f"OK: {stats['filas']} filas → {out}")
+            print(f"Pares paralelos: {stats['pares']} → {out.with_suffix('.pairs.tsv')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# maquetacion.py
+# Orden de lectura de los bloques de una página (o de un lote de páginas) con NumPy.
+# Uso:
+#   from maquetacion import lineas_en_orden
+#   for ln in lineas_en_orden(doc[i]): ...                     (alias: lines_in_reading_order)
+#   python maquetacion.py shiwilu-dictionary2.pdf [--desde 1] [--hasta N] [--lote 64]
+#       → compara con el corte fijo en la mitad de la página y mide ambos
+#   python maquetacion.py casos   → páginas sintéticas (CASOS) con su orden esperado
+#
+# Columnas por huecos en x, no por la mitad de la página:
+#   1) cobertura en x (1 pt por celda) de los bloques angostos (< FRAC_ANGOSTO del ancho de texto),
+#      pesada por su alto: una columna cubre casi todo el alto de texto de la página;
+#   2) canaleta = tramo interior de al menos MIN_CANALETA pt cubierto en menos de MAX_CRUCE del alto
+#      (tolera bloques que se meten en la canaleta); se descartan las que dejan una columna
+#      más angosta que MIN_COLUMNA del ancho de texto (folios, notas al margen);
+#   3) columna de un bloque = nº de canaletas que terminan a la izquierda de su x0; un bloque puede
+#      empezar dentro de la canaleta hasta MIN_LADO de su ancho (o MIN_CANALETA pt) y seguir siendo de
+#      la columna de la derecha: una línea con sangría negativa entra en la canaleta y la ensancha
+#      (MAX_CRUCE), pero casi todo su ancho está en la columna; un título centrado, no.
+# Un bloque que cruza una canaleta con al menos MIN_LADO de su ancho a cada lado (título centrado,
+# línea a todo el ancho) no es de ninguna columna: abre una franja nueva, y dentro de cada franja
+# se leen las columnas de izquierda a derecha. Orden final: un solo lexsort por
+# (página, franja, columna, y0, x0), con y0/x0 redondeados a 0,1 como antes.
+# Con dos columnas y sin bloques a todo el ancho da el mismo orden que el corte en la mitad.
+
+import sys, time
+import numpy as np
+from comun import norm, arg
+
+FRAC_ANGOSTO = 0.8
+MIN_CANALETA = 6      # pt
+MAX_CRUCE = 0.1
+MIN_COLUMNA = 0.15
+MIN_LADO = 0.25
+LOTE = 64
+
+def _cuenta(claves, desde, hasta):
+    """Por fila: cuántas claves (ordenadas) caen en [desde, hasta)."""
+    return np.searchsorted(claves, hasta, "left") - np.searchsorted(claves, desde, "left")
+
+def orden_lectura(caja, pag, anchos):
+    """
+    caja: (n, 4) x0,y0,x1,y1 de todos los bloques; pag: (n,) página de cada bloque (0..P-1, no decreciente);
+    anchos: (P,) ancho de cada página. Devuelve (orden, columna, franja); columna -1 = a todo el ancho.
+    """
+    caja = np.asarray(caja, dtype=float).reshape(-1, 4)
+    pag = np.asarray(pag, dtype=np.int64)
+    anchos = np.asarray(anchos, dtype=float)
+    n, P = len(caja), len(anchos)
+    if n == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int64)
+    x0, y0, x1, y1 = caja.T
+    W = int(np.ceil(max(anchos.max(), x1.max()))) + 2
+    K = W + 1                                   # clave página-mayor: pag*K + x
+
+    cuantos = np.bincount(pag, minlength=P)
+    inicio = np.cumsum(cuantos) - cuantos
+    llena = cuantos > 0
+    xmin = np.full(P, np.inf); xmin[llena] = np.minimum.reduceat(x0, inicio[llena])
+    xmax = np.full(P, -np.inf); xmax[llena] = np.maximum.reduceat(x1, inicio[llena])
+    texto = np.where(llena, xmax - xmin, 0.0)
+    alto = np.zeros(P)
+    alto[llena] = np.maximum.reduceat(y1, inicio[llena]) - np.minimum.reduceat(y0, inicio[llena])
+
+    # 1) cobertura de los bloques angostos, todas las páginas a la vez
+    angosto = (x1 - x0) < FRAC_ANGOSTO * texto[pag]
+    a = np.clip(np.floor(x0[angosto]), 0, W - 1).astype(np.int64)
+    b = np.clip(np.ceil(x1[angosto]), 0, W - 1).astype(np.int64)
+    base, h = pag[angosto] * W, (y1 - y0)[angosto]
+    cob = np.cumsum((np.bincount(base + a, h, minlength=P * W) -
+                     np.bincount(base + b, h, minlength=P * W)).reshape(P, W), axis=1)
+
+    # 2) canaletas: tramos interiores de baja cobertura
+    celdas = np.arange(W)
+    hueco = (cob <= MAX_CRUCE * alto[:, None] + 1e-6) & (celdas > xmin[:, None]) & (celdas < xmax[:, None])
+    marco = np.zeros((P, W + 2), np.int8); marco[:, 1:-1] = hueco
+    borde = np.diff(marco, axis=1)
+    ps, s = np.nonzero(borde == 1)
+    _, e = np.nonzero(borde == -1)              # mismo orden (fila, columna): se emparejan
+    ok = (e - s) >= MIN_CANALETA
+    ps, s, e = ps[ok], s[ok], e[ok]
+    if len(ps):
+        misma = ps[1:] == ps[:-1]                # canaleta vecina en la misma página
+        izq, der = xmin[ps], xmax[ps]
+        izq[1:] = np.where(misma, e[:-1], izq[1:])
+        der[:-1] = np.where(misma, s[1:], der[:-1])
+        minimo = MIN_COLUMNA * texto[ps]
+        ok = (s - izq >= minimo) & (der - e >= minimo)
+        ps, s, e = ps[ok], s[ok], e[ok]
+
+    # 3) columna = nº de canaletas que terminan antes de x0 + margen (empezar bien dentro de una
+    #    canaleta, como un título centrado, cuenta como la columna de la izquierda, igual que
+    #    x0 < mitad); bloques que cruzan una canaleta con peso a ambos lados
+    kpag = pag * K
+    margen = np.maximum(MIN_CANALETA, MIN_LADO * (x1 - x0))
+    col = _cuenta(ps * K + e, kpag, kpag + x0 + margen + 1e-9)
+    i0 = np.searchsorted(ps * K + s, kpag + x0, "left")      # primera canaleta que empieza en x0 o después
+    dentro = np.searchsorted(ps * K + e, kpag + x1, "right") - i0
+    cruza = dentro > 0
+    if cruza.any():
+        j = np.minimum(i0, len(s) - 1)
+        lado = np.minimum(s[j] - x0, x1 - e[j])
+        cruza &= lado >= MIN_LADO * (x1 - x0)
+    col = np.where(cruza, -1, col)
+
+    # franjas: un bloque a todo el ancho empieza una franja que llega hasta el siguiente
+    yr, xr = np.round(y0, 1), np.round(x0, 1)
+    Y = yr.max() - yr.min() + 1
+    yk = pag * Y + (yr - yr.min())
+    franja = _cuenta(np.sort(yk[cruza]), pag * Y, yk + 1e-9)
+
+    return np.lexsort((xr, yr, col, franja, pag)), col, franja
+
+def bloques_de(page):
+    return page.get_text("blocks")   # (x0,y0,x1,y1,texto, nº de bloque, tipo)
+
+def ordenar_lote(bloques_por_pagina, anchos):
+    """Listas de bloques de varias páginas → por página, los índices de sus bloques en orden de lectura."""
+    cuantos = np.array([len(b) for b in bloques_por_pagina], dtype=np.int64)
+    caja = np.array([b[:4] for bl in bloques_por_pagina for b in bl], dtype=float)
+    pag = np.repeat(np.arange(len(cuantos)), cuantos)
+    orden, _, _ = orden_lectura(caja, pag, anchos)
+    fin = np.cumsum(cuantos).tolist()
+    return [orden[a:b] - a for a, b in zip([0] + fin[:-1], fin)]
+
+def lineas_de_bloques(bloques, orden):
+    for k in orden:
+        for ln in bloques[k][4].splitlines():
+            ln = norm(ln)
+            if ln: yield ln
+
+def lineas_en_orden(page):
+    """Líneas normalizadas de la página en orden de lectura (por columnas)."""
+    bloques = bloques_de(page)
+    orden, = ordenar_lote([bloques], [page.rect.width])
+    return lineas_de_bloques(bloques, orden)
+
+lines_in_reading_order = lineas_en_orden   # el nombre que usan los extractores
+
+def lineas_en_orden_lote(pages):
+    """Como lineas_en_orden, un lote de páginas con un solo orden_lectura(); una lista por página."""
+    bloques = [bloques_de(p) for p in pages]
+    ordenes = ordenar_lote(bloques, [p.rect.width for p in pages])
+    return [list(lineas_de_bloques(b, o)) for b, o in zip(bloques, ordenes)]
+
+# --- referencia: corte fijo en la mitad (la lógica anterior de los extractores) ---
+
+def orden_mitad(bloques, ancho):
+    mid = ancho / 2
+    clave = lambda k: (bloques[k][0] >= mid, round(bloques[k][1], 1), round(bloques[k][0], 1))
+    return sorted(range(len(bloques)), key=clave)
+
+# --- casos de regresión: (nombre, bloques x0,y0,x1,y1,etiqueta, orden esperado), página de 612 pt ---
+
+def _columna(x0, x1, pre, n, y=60, paso=40, alto=30):
+    return [(x0, y + paso * i, x1, y + paso * i + alto, f"{pre}{i}") for i in range(n)]
+
+def _sangria(bloques, etiqueta, x0, alto):
+    """El bloque `etiqueta` empieza en x0 (sangría negativa) y mide `alto` pt."""
+    return [(x0, b[1], b[2], b[1] + alto, b[4]) if b[4] == etiqueta else b for b in bloques]
+
+_L, _R = _columna(40, 280, "L", 12), _columna(320, 560, "R", 12)
+CASOS = [
+    ("dos columnas", _L + _R, [b[4] for b in _L + _R]),
+    ("sangría negativa en la canaleta", _L + _sangria(_R, "R5", 312, 10), [b[4] for b in _L + _R]),
+    ("cabecera centrada sobre la canaleta", [(267.5, 16, 337.4, 27.5, "H")] + _columna(40, 224, "L", 8)
+        + _columna(307.5, 504, "R", 8), ["H"] + [f"L{i}" for i in range(8)] + [f"R{i}" for i in range(8)]),
+    ("título a todo el ancho", _L[:6] + _R[:6] + [(40, 300, 560, 315, "T")] + _columna(40, 280, "M", 4, 330)
+        + _columna(320, 560, "N", 4, 330),
+        [f"L{i}" for i in range(6)] + [f"R{i}" for i in range(6)] + ["T"] + [f"M{i}" for i in range(4)]
+        + [f"N{i}" for i in range(4)]),
+    ("tres columnas", _columna(40, 190, "A", 6) + _sangria(_columna(210, 380, "B", 6), "B2", 203, 10)
+        + _columna(400, 560, "C", 6), [f"{c}{i}" for c in "ABC" for i in range(6)]),
+]
+
+def casos():
+    fallas = 0
+    for nombre, bloques, esperado in CASOS:
+        orden, = ordenar_lote([bloques], [612])
+        obtenido = [bloques[k][4] for k in orden]
+        ok = obtenido == esperado
+        fallas += not ok
+        print(f"{'OK   ' if ok else 'FALLA'} {nombre}" + ("" if ok else f"\n      {' '.join(obtenido)}"))
+    return fallas
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python maquetacion.py archivo.pdf [--desde 1] [--hasta N] [--lote 64]")
+        print("     python maquetacion.py casos")
+        sys.exit(1)
+    if sys.argv[1] == "casos":
+        sys.exit(1 if casos() else 0)
+    import fitz
+    doc = fitz.open(sys.argv[1])
+    desde = int(arg("--desde", "1")) - 1
+    hasta = int(arg("--hasta", str(len(doc))))
+    lote = int(arg("--lote", str(LOTE)))
+    bloques = [bloques_de(doc[i]) for i in range(desde, hasta)]
+    anchos = [doc[i].rect.width for i in range(desde, hasta)]
+    doc.close()
+
+    t0 = time.perf_counter()
+    antes = [orden_mitad(b, w) for b, w in zip(bloques, anchos)]
+    t1 = time.perf_counter()
+    una = [ordenar_lote([b], [w])[0] for b, w in zip(bloques, anchos)]
+    t2 = time.perf_counter()
+    ahora = [o for i in range(0, len(bloques), lote)
+             for o in ordenar_lote(bloques[i:i + lote], anchos[i:i + lote])]
+    t3 = time.perf_counter()
+
+    assert all(list(a) == list(b) for a, b in zip(una, ahora))
+    distintas = [desde + i + 1 for i, (a, b) in enumerate(zip(antes, ahora)) if list(a) != list(b)]
+    n = len(bloques) or 1
+    print(f"{len(bloques)} páginas, {sum(map(len, bloques))} bloques | mitad fija {(t1-t0)/n*1e6:.1f} µs/pág, "
+          f"por página {(t2-t1)/n*1e6:.1f} µs/pág, lote de {lote} {(t3-t2)/n*1e6:.1f} µs/pág")
+    print(f"Páginas con orden distinto al corte en la mitad: {len(distintas)}"
+          + (f" ({', '.join(map(str, distintas[:20]))}{' ...' if len(distintas) > 20 else ''})" if distintas else ""))
+
+if __name__ == "__main__":
+    main()
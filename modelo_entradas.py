@@ -0,0 +1,86 @@
+# modelo_entradas.py
+# Modelo de entrada compartido por los extractores y limpiar_entradas_v2.py: dataclasses con
+# __slots__ en vez de dicts por entrada (sin __dict__ ni tabla hash por instancia), etiquetas
+# POS internadas (una sola cadena "vt." para todas las entradas) y páginas como int.
+# Uso:
+#   from modelo_entradas import Entrada, EntradaEsShi, FilaEsShi, FilaLimpia, pos_interna, pagina
+#   w.writerow(fila.fila())           → tupla en el orden de CAMPOS (csv.writer, sin DictWriter)
+#   fila.a_dict()                      → dict para JSON (servidor_busqueda.py)
+#   python bench_memoria.py ...        → memoria y tiempo frente a los dicts de antes
+#
+#   Entrada        extraer_diccionario*.py   headword, page, page_end, partes → entry_text, ok
+#   EntradaEsShi   extraer_es_shi.py         es_head, shi_lemma, pos, page, partes → rest
+#   FilaEsShi      salida ES→SHI             es_head, shi_lemma, pos, def_es, examples_shi, examples_es, page
+#   FilaLimpia     limpiar_entradas_v2.py    headword, pos, gloss_es, examples_shi, examples_es, page
+# `partes` son los fragmentos de línea mientras la entrada está abierta; al cerrarla se unen una
+# sola vez y queda en None.
+
+import sys
+from dataclasses import dataclass
+from typing import ClassVar
+
+def pos_interna(pos: str) -> str:
+    """La etiqueta POS como cadena internada: todas las entradas comparten el mismo objeto."""
+    return sys.intern(pos)
+
+def pagina(p):
+    """Página leída de un CSV → int; vacía o ausente (None, fila corta) → ""; valores no canónicos quedan como texto."""
+    if isinstance(p, int): return p
+    p = str(p or "")
+    return int(p) if p.isdigit() and str(int(p)) == p else p
+
+class _Fila:
+    """Conversión a fila de CSV y a dict; cada clase lista sus columnas en CAMPOS."""
+    __slots__ = ()
+
+    def fila(self):
+        return tuple(getattr(self, c) for c in self.CAMPOS)
+
+    def a_dict(self):
+        return {c: getattr(self, c) for c in self.CAMPOS}
+
+@dataclass(slots=True)
+class Entrada(_Fila):
+    headword: str
+    page: int
+    page_end: int
+    partes: list = None
+    entry_text: str = ""
+    ok: bool = True                    # pasó el filtro final (extraccion_incremental.py)
+    CAMPOS: ClassVar = ("headword", "entry_text", "page")
+
+    def cerrar(self):
+        self.entry_text = " ".join(self.partes)
+        self.partes = None
+        return self
+
+@dataclass(slots=True)
+class EntradaEsShi(_Fila):
+    es_head: str
+    shi_lemma: str
+    pos: str
+    page: int
+    partes: list = None
+    rest: str = ""
+    CAMPOS: ClassVar = ("es_head", "shi_lemma", "pos", "rest", "page")
+
+@dataclass(slots=True)
+class FilaEsShi(_Fila):
+    es_head: str
+    shi_lemma: str
+    pos: str
+    def_es: str
+    examples_shi: str
+    examples_es: str
+    page: int
+    CAMPOS: ClassVar = ("es_head", "shi_lemma", "pos", "def_es", "examples_shi", "examples_es", "page")
+
+@dataclass(slots=True)
+class FilaLimpia(_Fila):
+    headword: str
+    pos: str
+    gloss_es: str
+    examples_shi: str
+    examples_es: str
+    page: int
+    CAMPOS: ClassVar = ("headword", "pos", "gloss_es", "examples_shi", "examples_es", "page")
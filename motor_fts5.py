@@ -0,0 +1,178 @@
+# motor_fts5.py
+# Motor de búsqueda persistente en SQLite FTS5 (sin servicio aparte).
+# Uso:
+#   python motor_fts5.py cargar motor.db diccionario_limpio.csv [es_shi_estructurado.csv]
+#   python motor_fts5.py buscar motor.db "a'cha" [--tabla shi_es|es_shi]
+#   python motor_fts5.py bench motor.db diccionario_limpio.csv [--n 2000]
+#
+# Tablas FTS5:
+#   shi_es   salida de limpiar_entradas_v2.py (headword, pos, gloss_es, examples_shi, examples_es, page)
+#   es_shi   salida de extraer_es_shi.py     (es_head, shi_lemma, pos, def_es, examples_shi, examples_es, page)
+# El tokenizador unicode61 lleva tokenchars ' y - para que a'cha o kuku'yu'-wanan sean un solo token
+# (igual que tokenizar() de indice_invertido.py). rowid = nº de fila del CSV.
+
+import sys, time, heapq, random, sqlite3, tempfile
+from itertools import islice
+from pathlib import Path
+from indice_invertido import IndiceInvertido, construir, tokenizar
+from comun import norm, arg
+from limpiar_entradas_v2 import open_csv_any
+
+TOKENIZADOR = "unicode61 remove_diacritics 0 tokenchars '''-'"
+TABLAS = {
+    "shi_es": (("headword", "pos", "gloss_es", "examples_shi", "examples_es", "page"), ("pos", "page")),
+    "es_shi": (("es_head", "shi_lemma", "pos", "def_es", "examples_shi", "examples_es", "page"), ("pos", "page")),
+}
+LOTE = 5000
+# solo durante la carga: sin diario ni fsync, caché grande, bloqueo exclusivo
+PRAGMAS_CARGA = ("journal_mode = OFF", "synchronous = OFF", "cache_size = -65536",
+                 "temp_store = MEMORY", "locking_mode = EXCLUSIVE")
+
+def tabla_de(campos) -> str:
+    for nombre, (cols, _) in TABLAS.items():
+        if set(cols) <= set(campos or []): return nombre
+    raise KeyError(f"Esquema no reconocido: {', '.join(campos or [])}")
+
+def crear(con, nombre: str):
+    cols, sin_indice = TABLAS[nombre]
+    defs = ", ".join(c + (" UNINDEXED" if c in sin_indice else "") for c in cols)
+    con.execute(f"DROP TABLE IF EXISTS {nombre}")
+    con.execute(f"CREATE VIRTUAL TABLE {nombre} USING fts5({defs}, tokenize = \"{TOKENIZADOR}\")")
+
+def cargar(ruta_db, rutas):
+    """Carga masiva: una transacción por lote de LOTE filas, 'optimize' al final. Devuelve {tabla: filas}."""
+    con = sqlite3.connect(ruta_db, isolation_level=None)
+    for p in PRAGMAS_CARGA:
+        con.execute(f"PRAGMA {p}")
+    res = {}
+    for ruta in rutas:
+        f, rdr, _ = open_csv_any(Path(ruta))
+        with f:
+            nombre = tabla_de(rdr.fieldnames)
+            cols = TABLAS[nombre][0]
+            crear(con, nombre)
+            sql = f"INSERT INTO {nombre}(rowid, {', '.join(cols)}) VALUES (?{', ?' * len(cols)})"
+            lote, n = [], 0
+            for fila, row in enumerate(rdr):
+                lote.append((fila, *(norm(row[c]) for c in cols)))
+                if len(lote) >= LOTE:
+                    con.execute("BEGIN"); con.executemany(sql, lote); con.execute("COMMIT")
+                    n += len(lote); lote = []
+            if lote:
+                con.execute("BEGIN"); con.executemany(sql, lote); con.execute("COMMIT")
+                n += len(lote)
+            con.execute(f"INSERT INTO {nombre}({nombre}) VALUES ('optimize')")
+            res[nombre] = n
+    con.close()
+    return res
+
+def consulta_fts(consulta: str) -> str:
+    """
+    AND de los tokens, cada uno entre comillas (así ' y - no se leen como sintaxis de FTS5).
+    tokenizar() quita - en los bordes y ' al inicio, pero FTS5 los conserva ("-tek", "wi'wek-"):
+    cada token se busca también con esas variantes.
+    """
+    partes = []
+    for t in dict.fromkeys(tokenizar(consulta)):
+        t = t.replace('"', '""')
+        variantes = [f'"{a}{t}{b}"' for a in ("", "-", "'", "-'") for b in ("", "-")]
+        partes.append("(" + " OR ".join(variantes) + ")")
+    return " AND ".join(partes)
+
+class MotorFTS5:
+    def __init__(self, ruta_db):
+        self.con = sqlite3.connect(f"file:{Path(ruta_db)}?mode=ro", uri=True, check_same_thread=False)
+        self.tablas = [t for t in TABLAS if self.con.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (t,)).fetchone()]
+
+    def cerrar(self):
+        self.con.close()
+
+    def buscar(self, consulta: str, limite: int = 50, tabla: str = None):
+        """
+        AND de los tokens. Primero las filas cuyo lema coincide con la consulta, luego por bm25,
+        en todas las tablas a la vez (cada tabla ya viene ordenada por esa clave: se mezclan).
+        Devuelve dicts {tabla, fila, headword, page}.
+        """
+        q = consulta_fts(consulta)
+        if not q: return []
+        exacto = norm(consulta).lower()
+        por_tabla = []
+        for t in ([tabla] if tabla else self.tablas):
+            head = TABLAS[t][0][0]
+            por_tabla.append([(no_exacto, r, t, fila, h, page) for fila, h, page, no_exacto, r in self.con.execute(
+                f"SELECT rowid, {head}, page, lower({head}) != ? AS x, bm25({t}) AS r FROM {t} "
+                f"WHERE {t} MATCH ? ORDER BY x, r LIMIT ?", (exacto, q, limite))])
+        mezcla = heapq.merge(*por_tabla, key=lambda f: f[:2])
+        return [{"tabla": t, "fila": fila, "headword": h, "page": int(page) if page.isdigit() else 0}
+                for _, _, t, fila, h, page in islice(mezcla, limite)]
+
+    def contar(self, consulta: str, tabla: str) -> int:
+        q = consulta_fts(consulta)
+        if not q: return 0
+        return self.con.execute(f"SELECT count(*) FROM {tabla} WHERE {tabla} MATCH ?", (q,)).fetchone()[0]
+
+    def registro(self, tabla: str, fila: int):
+        cols = TABLAS[tabla][0]
+        r = self.con.execute(f"SELECT {', '.join(cols)} FROM {tabla} WHERE rowid = ?", (fila,)).fetchone()
+        return dict(zip(cols, r)) if r else None
+
+def bench(ruta_db, ruta_csv, n: int):
+    """Mismas consultas contra FTS5 y contra el índice en memoria (indice_invertido.py) sobre el mismo CSV."""
+    f, rdr, _ = open_csv_any(Path(ruta_csv))
+    with f:
+        heads = [norm(r["headword"]) for r in rdr]
+    rnd = random.Random(0)
+    # la mitad de una palabra (headword), la otra de dos palabras cualesquiera del vocabulario
+    palabras = [t for h in heads for t in tokenizar(h)]
+    consultas = [rnd.choice(heads) if i % 2 == 0 else " ".join(rnd.sample(palabras, 2)) for i in range(n)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_idx = Path(tmp) / "indice.idx"
+        t0 = time.perf_counter(); construir([ruta_csv], ruta_idx); t_idx = time.perf_counter() - t0
+        idx = IndiceInvertido.cargar(ruta_idx)
+        motor = MotorFTS5(ruta_db)
+
+        def cronometrar(fn):
+            t0 = time.perf_counter()
+            res = [fn(q) for q in consultas]
+            return (time.perf_counter() - t0) / len(consultas) * 1000, res
+
+        ms_fts, r_fts = cronometrar(lambda q: {r["fila"] for r in motor.buscar(q, 10**6, "shi_es")})
+        ms_mem, r_mem = cronometrar(lambda q: {r["fila"] for r in idx.buscar(q, 10**6)})
+        iguales = sum(a == b for a, b in zip(r_fts, r_mem))
+        idx.cerrar(); motor.cerrar()
+
+    print(f"{len(consultas)} consultas sobre {Path(ruta_csv).name} ({len(heads)} filas)")
+    print(f"  FTS5              {ms_fts:8.3f} ms/consulta")
+    print(f"  índice invertido  {ms_mem:8.3f} ms/consulta (construcción {t_idx:.2f} s)")
+    print(f"  mismos resultados en {iguales}/{len(consultas)} consultas")
+
+def main():
+    if len(sys.argv) < 4 or sys.argv[1] not in ("cargar", "buscar", "bench"):
+        print('Uso: python motor_fts5.py cargar motor.db diccionario_limpio.csv [es_shi_estructurado.csv]')
+        print('     python motor_fts5.py buscar motor.db "consulta" [--tabla shi_es|es_shi]')
+        print('     python motor_fts5.py bench motor.db diccionario_limpio.csv [--n 2000]')
+        sys.exit(1)
+    cmd, ruta = sys.argv[1], Path(sys.argv[2])
+    if cmd == "cargar":
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        t0 = time.perf_counter()
+        res = cargar(ruta, [a for a in sys.argv[3:] if not a.startswith("--")])
+        dt = time.perf_counter() - t0
+        n = sum(res.values())
+        print(f"OK: {', '.join(f'{t} {k}' for t, k in res.items())} filas en {dt:.2f} s "
+              f"({n/dt:.0f} filas/s) → {ruta} ({ruta.stat().st_size} bytes)")
+    elif cmd == "buscar":
+        motor = MotorFTS5(ruta)
+        t0 = time.perf_counter()
+        res = motor.buscar(sys.argv[3], tabla=arg("--tabla", None))
+        dt = (time.perf_counter() - t0) * 1000
+        for r in res:
+            print(f"{r['tabla']}:{r['fila']}\tp.{r['page']}\t{r['headword']}")
+        print(f"{len(res)} resultados en {dt:.3f} ms")
+    else:
+        bench(ruta, sys.argv[3], int(arg("--n", "2000")))
+
+if __name__ == "__main__":
+    main()
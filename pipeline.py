@@ -0,0 +1,206 @@
+# pipeline.py
+# Reconstrucción completa en un solo comando: extracción, limpieza e índices como un grafo de etapas.
+# Uso:
+#   python pipeline.py build shiwilu-dictionary2.pdf [--salida .] [--procesos 8] [--shi 5-479] [--es 480-1076]
+#   (opcional) --solo fts5,corpus   → solo esas etapas y las que necesitan
+#   python pipeline.py grafo        → etapas y sus dependencias
+#
+# El PDF se abre una sola vez: la etapa "paginas" construye (o reutiliza) la caché de páginas
+# (cache_paginas.py) y el resto lee las líneas de esa tabla mmap, sin PyMuPDF. Cada etapa corre
+# en un proceso aparte apenas terminan sus dependencias: SHI→ES, ES→SHI, ES→SHI estructurado y el
+# extractor lineal van en paralelo. "limpio" recibe en memoria las filas que escribió "utf8"
+# (sin volver a leer diccionario_utf8.csv); los índices se construyen con el construir() de cada
+# módulo sobre los CSV ya escritos. Las salidas son las mismas que corriendo cada script a mano.
+
+import os, sys, time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from comun import arg
+from cache_paginas import CachePaginas, ruta_cache, construir_cache
+import extraer_diccionario_dual as dual
+import extraer_diccionario as lineal
+import extraer_es_shi as es_shi
+import limpiar_entradas_v2 as limpiar
+
+SHI = (5, 479)
+ES = (480, 1076)
+COLS_CRUDO = {"headword": "headword", "entry_text": "entry_text", "page": "page"}
+
+def rango(s: str, defecto):
+    if not s: return defecto
+    a, b = s.split("-")
+    return int(a), int(b)
+
+# --- etapas: (opciones, {dependencia: resultado}) → (resumen, resultado) ---
+
+def etapa_paginas(op, dep):
+    ruta = ruta_cache(op["pdf"])
+    if ruta.exists():
+        return f"caché vigente {ruta}", str(ruta)
+    n = construir_cache(op["pdf"], ruta)
+    return f"{n} páginas → {ruta}", str(ruta)
+
+def _dual(op, dep, mode, desde_hasta, nombre):
+    paginas = CachePaginas(dep["paginas"])
+    try:
+        start, end = dual.rango_paginas(len(paginas), *desde_hasta)
+        entries, cand = dual.segmentar_lineas(paginas.lineas, start, end, mode)
+    finally:
+        paginas.cerrar()
+    out = op["salida"] / nombre
+    kept, _ = dual.escribir_csv(out, [e for e in entries if dual.pasa_filtro(e, mode)], mode)
+    return f"candidatos {cand}, cerradas {len(entries)}, guardadas {kept} → {out}", str(out)
+
+def etapa_shi_es(op, dep):
+    return _dual(op, dep, "shi", op["shi"], "diccionario_shi_es.csv")
+
+def etapa_es_shi(op, dep):
+    return _dual(op, dep, "es", op["es"], "diccionario_es_shi.csv")
+
+def etapa_estructurado(op, dep):
+    paginas = CachePaginas(dep["paginas"])
+    out = op["salida"] / "es_shi_estructurado.csv"
+    try:
+        n = es_shi.escribir_csv(out, es_shi.run_lineas(paginas.lineas, len(paginas), op["es"][0] - 1, op["es"][1]))
+    finally:
+        paginas.cerrar()
+    return f"{n} filas → {out}", str(out)
+
+def etapa_utf8(op, dep):
+    paginas = CachePaginas(dep["paginas"])
+    try:
+        entries, cand, kept = lineal.segmentar(paginas.lineas_texto, len(paginas))
+    finally:
+        paginas.cerrar()
+    out = op["salida"] / "diccionario_utf8.csv"
+    filas = lineal.escribir_csv(out, entries)
+    return f"candidatos {cand}, cerradas {kept}, guardadas {len(filas)} → {out}", (str(out), filas)
+
+def etapa_limpio(op, dep):
+    _, filas = dep["utf8"]
+    out = op["salida"] / "diccionario_limpio.csv"
+    stats = limpiar.escribir_limpio(out, filas, COLS_CRUDO)
+    return f"{stats['filas']} filas, {stats['pares']} pares → {out}", str(out)
+
+def _csv(dep, nombre):
+    r = dep[nombre]
+    return r[0] if isinstance(r, tuple) else r
+
+def etapa_indice(op, dep):
+    from indice_invertido import construir
+    out = op["salida"] / "indice.idx"
+    n_docs, n_tokens = construir([_csv(dep, d) for d in ("utf8", "shi_es", "es_shi")], out)
+    return f"{n_docs} documentos, {n_tokens} tokens → {out}", str(out)
+
+def etapa_bm25(op, dep):
+    from bm25 import construir
+    out = op["salida"] / "bm25.npz"
+    construir([_csv(dep, d) for d in ("utf8", "shi_es", "es_shi")], out)
+    return f"→ {out}", str(out)
+
+def etapa_autocompletar(op, dep):
+    from autocompletar import construir
+    out = op["salida"] / "autocompletar.tbl"
+    construir([_csv(dep, d) for d in ("shi_es", "estructurado")], out)
+    return f"→ {out}", str(out)
+
+def etapa_fts5(op, dep):
+    from motor_fts5 import cargar
+    out = op["salida"] / "motor.db"
+    out.unlink(missing_ok=True)
+    res = cargar(out, [_csv(dep, d) for d in ("limpio", "estructurado")])
+    return ", ".join(f"{t} {n}" for t, n in res.items()) + f" filas → {out}", str(out)
+
+def etapa_almacen(op, dep):
+    from almacen_unificado import construir
+    out = op["salida"] / "diccionario.db"
+    n, enlaces, n_pos = construir([_csv(dep, d) for d in ("utf8", "shi_es", "es_shi", "estructurado")], out)
+    return f"{n} entradas, {enlaces} enlaces, {n_pos} POS → {out}", str(out)
+
+def etapa_formas(op, dep):
+    from formas_lemas import construir
+    out = op["salida"] / "formas.tbl"
+    n_formas, n_filas = construir([_csv(dep, d) for d in ("utf8", "shi_es")], out)
+    return f"{n_formas} formas, {n_filas} pares → {out}", str(out)
+
+def etapa_corpus(op, dep):
+    from corpus_paralelo import construir
+    out = op["salida"] / "corpus.db"
+    n = construir(out, [_csv(dep, d) for d in ("utf8", "estructurado")])
+    return f"{n} pares alineados → {out}", str(out)
+
+# nombre → (dependencias, función)
+ETAPAS = {
+    "paginas": ((), etapa_paginas),
+    "shi_es": (("paginas",), etapa_shi_es),
+    "es_shi": (("paginas",), etapa_es_shi),
+    "estructurado": (("paginas",), etapa_estructurado),
+    "utf8": (("paginas",), etapa_utf8),
+    "limpio": (("utf8",), etapa_limpio),
+    "indice": (("utf8", "shi_es", "es_shi"), etapa_indice),
+    "bm25": (("utf8", "shi_es", "es_shi"), etapa_bm25),
+    "autocompletar": (("shi_es", "estructurado"), etapa_autocompletar),
+    "fts5": (("limpio", "estructurado"), etapa_fts5),
+    "almacen": (("utf8", "shi_es", "es_shi", "estructurado"), etapa_almacen),
+    "formas": (("utf8", "shi_es"), etapa_formas),
+    "corpus": (("utf8", "estructurado"), etapa_corpus),
+}
+
+def con_dependencias(pedidas):
+    """Las etapas pedidas y todas las que necesitan, en el orden de ETAPAS."""
+    faltan = [e for e in pedidas if e not in ETAPAS]
+    if faltan: raise KeyError(f"Etapas inexistentes: {', '.join(faltan)}")
+    todas, pila = set(), list(pedidas)
+    while pila:
+        e = pila.pop()
+        if e not in todas:
+            todas.add(e); pila.extend(ETAPAS[e][0])
+    return [e for e in ETAPAS if e in todas]
+
+def _correr(fn, op, dep):
+    t0 = time.perf_counter()
+    resumen, res = fn(op, dep)
+    return resumen, res, time.perf_counter() - t0
+
+def ejecutar(nombres, op, procesos: int):
+    """Lanza cada etapa apenas terminan sus dependencias. Devuelve {etapa: resultado}."""
+    pendientes = {e: ETAPAS[e] for e in nombres}
+    hechos, en_curso = {}, {}
+    with ProcessPoolExecutor(max_workers=procesos) as ex:
+        while pendientes or en_curso:
+            for e, (deps, fn) in list(pendientes.items()):
+                if all(d in hechos for d in deps):
+                    del pendientes[e]
+                    en_curso[ex.submit(_correr, fn, op, {d: hechos[d] for d in deps})] = e
+            if not en_curso:
+                raise RuntimeError(f"Dependencias circulares: {', '.join(pendientes)}")
+            listos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for fut in listos:
+                e = en_curso.pop(fut)
+                resumen, hechos[e], dt = fut.result()
+                print(f"[{e}] {resumen} ({dt:.1f} s)", flush=True)
+    return hechos
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("build", "grafo") or (sys.argv[1] == "build" and len(sys.argv) < 3):
+        print("Uso: python pipeline.py build PDF [--salida .] [--procesos N] [--shi 5-479] [--es 480-1076] [--solo a,b]")
+        print("     python pipeline.py grafo")
+        sys.exit(1)
+    if sys.argv[1] == "grafo":
+        for e, (deps, fn) in ETAPAS.items():
+            print(f"{e:<14} ← {', '.join(deps) or '-'}")
+        return
+
+    op = {"pdf": Path(sys.argv[2]), "salida": Path(arg("--salida", ".")),
+          "shi": rango(arg("--shi", None), SHI), "es": rango(arg("--es", None), ES)}
+    op["salida"].mkdir(parents=True, exist_ok=True)
+    solo = arg("--solo", None)
+    nombres = con_dependencias(solo.split(",")) if solo else list(ETAPAS)
+    procesos = int(arg("--procesos", str(min(len(nombres), os.cpu_count() or 1))))
+
+    t0 = time.perf_counter()
+    ejecutar(nombres, op, procesos)
+    print(f"OK: {len(nombres)} etapas en {time.perf_counter() - t0:.1f} s → {op['salida']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+# servidor_busqueda.py
+# Servicio HTTP de búsqueda (solo stdlib: asyncio) sobre los CSV del diccionario.
+# Uso:
+#   python servidor_busqueda.py diccionario_utf8.csv diccionario_shi_es.csv diccionario_es_shi.csv [--puerto 8000] [--hilos 4] [--indice indice.idx]
+#   python servidor_busqueda.py carga diccionario_shi_es.csv [--puerto 8000] [--n 2000] [--c 16]
+#
+# Rutas (respuestas JSON):
+#   /search?q=...&limit=20   AND de tokens (indice_invertido.py); si q es una forma flexionada listada en
+#                            una entrada (formas_lemas.py), primero la entrada de su lema; sin resultados, sugerencias difusas
+#   /entry/<headword>        todos los registros cuyo headword coincide (sin distinguir mayúsculas);
+#                            si no hay, los del lema de la forma (a'anutulli → a'anu'tapalli); cada registro
+#                            crudo trae "estructura" (pos, glosa, ejemplos), procesada al pedirla (entradas_perezosas.py)
+#   /stats                   peticiones, aciertos de caché y latencia p50/p99 por ruta
+#
+# Los datos se cargan una sola vez al arrancar. La búsqueda corre en un pool de hilos
+# (el bucle de eventos solo parsea HTTP); un semáforo acota las consultas en vuelo y
+# una caché LRU con TTL responde las repetidas sin tocar el pool.
+
+import sys, json, time, random, asyncio, tempfile
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs, unquote, quote
+from indice_invertido import IndiceInvertido, construir, ruta_docs
+from busqueda_difusa import IndiceDifuso
+from formas_lemas import FormasLemas
+from entradas_perezosas import EntradasPerezosas
+from comun import norm, arg
+
+MAX_CACHE = 4096
+TTL = 300.0          # segundos
+MUESTRAS = 10000     # latencias guardadas por ruta para los percentiles
+ESTADOS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+class CacheTTL:
+    """LRU acotada con caducidad por entrada (OrderedDict: el más reciente al final)."""
+    def __init__(self, maximo: int = MAX_CACHE, ttl: float = TTL):
+        self.maximo, self.ttl = maximo, ttl
+        self.datos = OrderedDict()
+        self.aciertos = self.fallos = 0
+
+    def get(self, clave):
+        v = self.datos.get(clave)
+        if v is None or v[0] < time.monotonic():
+            if v is not None: del self.datos[clave]
+            self.fallos += 1
+            return None
+        self.datos.move_to_end(clave)
+        self.aciertos += 1
+        return v[1]
+
+    def put(self, clave, valor):
+        self.datos[clave] = (time.monotonic() + self.ttl, valor)
+        self.datos.move_to_end(clave)
+        while len(self.datos) > self.maximo:
+            self.datos.popitem(last=False)
+
+def percentil(orden, p: float) -> float:
+    if not orden: return 0.0
+    return orden[min(len(orden) - 1, int(p * len(orden)))]
+
+class Latencias:
+    def __init__(self):
+        self.por_ruta = {}
+        self.total = {}
+
+    def anotar(self, ruta: str, ms: float):
+        self.por_ruta.setdefault(ruta, deque(maxlen=MUESTRAS)).append(ms)
+        self.total[ruta] = self.total.get(ruta, 0) + 1
+
+    def resumen(self):
+        res = {}
+        for ruta, ms in self.por_ruta.items():
+            orden = sorted(ms)
+            res[ruta] = {"peticiones": self.total[ruta], "p50_ms": round(percentil(orden, 0.50), 3),
+                         "p99_ms": round(percentil(orden, 0.99), 3), "max_ms": round(orden[-1], 3)}
+        return res
+
+class Buscador:
+    """Índice invertido + índice difuso + headword → documentos + forma → lema; solo lectura, seguro entre hilos."""
+    def __init__(self, csvs, ruta_indice=None):
+        if ruta_indice is None:
+            self._tmp = tempfile.TemporaryDirectory(prefix="indice_")
+            ruta_indice = Path(self._tmp.name) / "indice.idx"
+        ruta_indice = Path(ruta_indice)
+        if not vigente(ruta_indice, csvs):
+            construir(csvs, ruta_indice)
+        self.idx = IndiceInvertido.cargar(ruta_indice)
+        self.por_head = {}
+        docs = self.idx.docs
+        for d in range(len(docs)):
+            self.por_head.setdefault(docs.celda(d, 3).lower(), []).append(d)
+        self.difuso = IndiceDifuso(((docs.celda(d, 3), 1) for d in range(len(docs))))
+        self.formas = FormasLemas.desde_csv(csvs)
+        self.estructuradas = EntradasPerezosas(docs)   # process_row solo al mostrar la entrada
+
+    def lemas(self, q: str, tipos=("forma",)):
+        """[(lema, tipo)] de la forma q cuyo lema tiene entrada."""
+        return [(l, t) for l, t in self.formas.resolver(q, tipos) if l in self.por_head]
+
+    def buscar(self, q: str, limite: int):
+        lemas = self.lemas(q)
+        res = self.idx.buscar(q, limite)
+        out = {"q": q, "resultados": res}
+        if lemas:
+            out["lemas"] = [{"lema": l, "tipo": t} for l, t in lemas]
+            primeros = [self.idx.doc(d) for l, _ in lemas for d in self.por_head[l]]
+            vistos = {(r["fuente"], r["fila"]) for r in primeros}
+            out["resultados"] = (primeros + [r for r in res if (r["fuente"], r["fila"]) not in vistos])[:limite]
+        elif not res:
+            out["quiza"] = [{"headword": h, "distancia": k} for h, k in self.difuso.buscar(q, limite=5)]
+        return out
+
+    def entrada(self, head: str):
+        ds = self.por_head.get(norm(head).lower(), [])
+        out = {"headword": head}
+        if not ds:
+            lemas = self.lemas(head, ("forma", "cf", "val"))
+            if lemas:
+                out["lemas"] = [{"lema": l, "tipo": t} for l, t in lemas]
+                ds = [d for l, _ in lemas for d in self.por_head[l]]
+        out["registros"] = []
+        for d in ds:
+            r = self.idx.registro(d)
+            if r["entry_text"]:
+                r["estructura"] = self.estructuradas.entrada(d)
+            out["registros"].append(r)
+        return out
+
+def vigente(ruta: Path, csvs) -> bool:
+    """El índice guardado sirve si existe y es más nuevo que todos los CSV."""
+    if not (ruta.exists() and ruta_docs(ruta).exists()): return False
+    t = min(ruta.stat().st_mtime, ruta_docs(ruta).stat().st_mtime)
+    return all(Path(c).stat().st_mtime <= t for c in csvs)
+
+class Servidor:
+    def __init__(self, buscador: Buscador, hilos: int = 4):
+        self.b = buscador
+        self.pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="busqueda")
+        self.cupo = asyncio.Semaphore(hilos * 4)   # consultas en vuelo (ejecutándose + en cola)
+        self.cache = CacheTTL()
+        self.lat = Latencias()
+
+    async def atender(self, ruta: str, params):
+        """Devuelve (estado, objeto JSON)."""
+        if ruta == "/stats":
+            c, e = self.cache, self.b.estructuradas
+            return 200, {"latencia": self.lat.resumen(), "cache": {"entradas": len(c.datos),
+                         "aciertos": c.aciertos, "fallos": c.fallos},
+                         "estructuradas": {"entradas": len(e.datos), "aciertos": e.aciertos, "fallos": e.fallos}}
+        if ruta == "/search":
+            q = norm(params.get("q", [""])[0])
+            if not q: return 400, {"error": "falta q"}
+            try:
+                limite = max(1, min(200, int(params.get("limit", ["20"])[0])))
+            except ValueError:
+                return 400, {"error": "limit inválido"}
+            clave, fn, args = ("s", q.lower(), limite), self.b.buscar, (q, limite)
+        elif ruta.startswith("/entry/"):
+            head = norm(unquote(ruta[len("/entry/"):]))
+            if not head: return 400, {"error": "falta headword"}
+            clave, fn, args = ("e", head.lower()), self.b.entrada, (head,)
+        else:
+            return 404, {"error": "ruta desconocida"}
+
+        res = self.cache.get(clave)
+        if res is None:
+            if self.cupo.locked():
+                return 503, {"error": "servidor ocupado"}
+            async with self.cupo:
+                res = await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+            self.cache.put(clave, res)
+        if ruta.startswith("/entry/") and not res["registros"]:
+            return 404, res
+        return 200, res
+
+    @staticmethod
+    async def responder(writer, estado: int, obj, cerrar: bool):
+        cuerpo = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        writer.write(f"HTTP/1.1 {estado} {ESTADOS[estado]}\r\n"
+                     f"Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(cuerpo)}\r\n"
+                     f"Connection: {'close' if cerrar else 'keep-alive'}\r\n\r\n".encode("latin-1") + cuerpo)
+        await writer.drain()
+
+    async def conexion(self, reader, writer):
+        """HTTP/1.1 mínimo con keep-alive: solo GET, sin cuerpo de petición."""
+        try:
+            while True:
+                try:
+                    linea = await reader.readline()
+                    if not linea: break
+                    cerrar = False
+                    while True:
+                        h = await reader.readline()
+                        if h in (b"\r\n", b"\n", b""): break
+                        if h.lower().startswith(b"connection:") and b"close" in h.lower(): cerrar = True
+                except ValueError:   # línea o cabecera más larga que el límite del StreamReader (64 KiB)
+                    await self.responder(writer, 431, {"error": "petición demasiado larga"}, True)
+                    break
+                t0 = time.perf_counter()
+                partes = linea.decode("latin-1").split()
+                if len(partes) != 3:
+                    estado, obj, ruta = 400, {"error": "petición inválida"}, "?"
+                elif partes[0] != "GET":
+                    estado, obj, ruta = 405, {"error": "solo GET"}, "?"
+                else:
+                    u = urlsplit(partes[1])
+                    try:
+                        estado, obj = await self.atender(u.path, parse_qs(u.query))
+                    except Exception as e:   # falló la consulta (p. ej. en el pool): 500, la conexión sigue
+                        estado, obj = 500, {"error": f"{type(e).__name__}: {e}"}
+                    ruta = "/entry" if u.path.startswith("/entry/") else u.path
+                await self.responder(writer, estado, obj, cerrar)
+                if ruta in ("/search", "/entry"):
+                    self.lat.anotar(ruta, (time.perf_counter() - t0) * 1000)
+                if cerrar: break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def servir(csvs, puerto: int, hilos: int, ruta_indice=None):
+    t0 = time.perf_counter()
+    b = Buscador(csvs, ruta_indice)
+    srv = Servidor(b, hilos)
+    server = await asyncio.start_server(srv.conexion, "127.0.0.1", puerto)
+    print(f"OK: {len(b.idx.docs)} documentos, {len(b.difuso.formas)} headwords "
+          f"(carga {time.perf_counter()-t0:.2f} s) | http://127.0.0.1:{puerto} | hilos: {hilos}")
+    async with server:
+        await server.serve_forever()
+
+# --- generador de carga ---
+
+async def cliente(puerto: int, rutas, lat):
+    reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+    try:
+        for r in rutas:
+            t0 = time.perf_counter()
+            writer.write(f"GET {r} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode("latin-1"))
+            await writer.drain()
+            await reader.readline()
+            largo = 0
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b""): break
+                if h.lower().startswith(b"content-length:"): largo = int(h.split(b":")[1])
+            await reader.readexactly(largo)
+            lat.append((time.perf_counter() - t0) * 1000)
+    finally:
+        writer.close()
+
+async def carga(csv_consultas, puerto: int, n: int, c: int):
+    """n peticiones repartidas en c conexiones; ~1/3 repetidas para ejercitar la caché."""
+    import csv
+    with open(csv_consultas, "r", encoding="utf-8", newline="") as f:
+        heads = [norm(r.get("headword") or r.get("es_head")) for r in csv.DictReader(f)]
+    heads = [h for h in heads if h]
+    rnd = random.Random(0)
+    calientes = rnd.sample(heads, min(50, len(heads)))
+    rutas = []
+    for i in range(n):
+        h = rnd.choice(calientes) if i % 3 == 0 else rnd.choice(heads)
+        rutas.append(f"/search?q={quote(h)}" if i % 2 == 0 else f"/entry/{quote(h)}")
+    lat = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(cliente(puerto, rutas[k::c], lat) for k in range(c)))
+    dt = time.perf_counter() - t0
+    orden = sorted(lat)
+    print(f"{len(lat)} peticiones, {c} conexiones: {len(lat)/dt:.0f} req/s | "
+          f"cliente p50 {percentil(orden, 0.5):.2f} ms, p99 {percentil(orden, 0.99):.2f} ms")
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+    writer.write(b"GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n")
+    resp = await reader.read()
+    writer.close()
+    print("servidor:", resp.split(b"\r\n\r\n", 1)[1].decode("utf-8"))
+
+def main():
+    puerto = int(arg("--puerto", "8000"))
+    if len(sys.argv) >= 3 and sys.argv[1] == "carga":
+        asyncio.run(carga(sys.argv[2], puerto, int(arg("--n", "2000")), int(arg("--c", "16"))))
+        return
+    csvs = [a for a in sys.argv[1:] if a.endswith(".csv")]
+    if not csvs:
+        print("Uso: python servidor_busqueda.py A.csv [B.csv ...] [--puerto 8000] [--hilos 4] [--indice indice.idx]")
+        print("     python servidor_busqueda.py carga A.csv [--puerto 8000] [--n 2000] [--c 16]")
+        sys.exit(1)
+    try:
+        asyncio.run(servir(csvs, puerto, int(arg("--hilos", "4")), arg("--indice", None)))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# tabla_mmap.py
+# Formato binario de tabla para abrir con mmap sin parsear: tabla de offsets de ancho fijo + heap UTF-8.
+# Uso:
+#   python tabla_mmap.py diccionario_utf8.csv diccionario_utf8.tbl
+#   python tabla_mmap.py ver diccionario_utf8.tbl [N]
+#
+# Disposición del archivo (little-endian):
+#   MAGIC(8) | n_filas u32 | n_cols u32 | largo_cabecera u32
+#   cabecera: nombres de columna separados por "\n" (UTF-8)
+#   offsets: (n_filas*n_cols + 1) × u32, relativos al inicio del heap
+#   heap: celdas concatenadas (UTF-8 o bytes crudos)
+
+import sys, mmap, struct
+from pathlib import Path
+
+MAGIC = b"SHITBL\x01\x00"
+CAB = struct.Struct("<III")
+
+def escribir_tabla(ruta, columnas, filas):
+    """Escribe filas (secuencias de str/bytes/int) con las columnas dadas."""
+    columnas = list(columnas)
+    n_cols = len(columnas)
+    offsets, heap, n_filas = [0], bytearray(), 0
+    for fila in filas:
+        if len(fila) != n_cols:
+            raise ValueError(f"Fila {n_filas} con {len(fila)} celdas (se esperaban {n_cols})")
+        for v in fila:
+            heap += v if isinstance(v, (bytes, bytearray)) else str(v).encode("utf-8")
+            offsets.append(len(heap))
+        n_filas += 1
+    if len(heap) > 0xFFFFFFFF:
+        raise ValueError("Heap mayor a 4 GiB")
+    cab = "\n".join(columnas).encode("utf-8")
+    ruta = Path(ruta)
+    with ruta.open("wb") as f:
+        f.write(MAGIC)
+        f.write(CAB.pack(n_filas, n_cols, len(cab)))
+        f.write(cab)
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(heap)
+    return n_filas
+
+class TablaMmap:
+    """
+    Lectura perezosa sobre mmap: cada celda se decodifica solo al pedirla.
+    Varios procesos que abren el mismo archivo comparten las páginas físicas.
+    """
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        with self.ruta.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"No es una tabla válida: {ruta}")
+        self.n_filas, self.n_cols, largo = CAB.unpack_from(self._mm, 8)
+        base = 8 + CAB.size
+        self.columnas = self._mm[base:base+largo].decode("utf-8").split("\n") if self.n_cols else []
+        self._col = {c: j for j, c in enumerate(self.columnas)}
+        self._offsets = base + largo
+        self._heap = self._offsets + 4 * (self.n_filas * self.n_cols + 1)
+
+    def __len__(self):
+        return self.n_filas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        self._mm.close()
+
+    def columna(self, nombre: str) -> int:
+        return self._col[nombre]
+
+    def _rango(self, i: int, j: int):
+        if not 0 <= i < self.n_filas:
+            raise IndexError(i)
+        ini, fin = struct.unpack_from("<II", self._mm, self._offsets + 4 * (i * self.n_cols + j))
+        return self._heap + ini, self._heap + fin
+
+    def celda_bytes(self, i: int, j) -> bytes:
+        if isinstance(j, str): j = self._col[j]
+        ini, fin = self._rango(i, j)
+        return self._mm[ini:fin]
+
+    def celda(self, i: int, j) -> str:
+        return self.celda_bytes(i, j).decode("utf-8")
+
+    def fila(self, i: int):
+        return tuple(self.celda(i, j) for j in range(self.n_cols))
+
+def csv_a_tabla(origen, destino):
+    """Convierte un CSV (cualquier codificación que acepte open_csv_any) a tabla mmap."""
+    from limpiar_entradas_v2 import open_csv_any
+    f, rdr, hdrs = open_csv_any(Path(origen))
+    try:
+        filas = ([row.get(h) or "" for h in rdr.fieldnames] for row in rdr)
+        return escribir_tabla(destino, hdrs, filas)
+    finally:
+        f.close()
+
+def main():
+    if len(sys.argv) >= 3 and sys.argv[1] == "ver":
+        n = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+        with TablaMmap(sys.argv[2]) as t:
+            print("\t".join(t.columnas))
+            for i in range(min(n, len(t))):
+                print("\t".join(t.fila(i)))
+            print(f"({len(t)} filas)")
+        return
+    if len(sys.argv) < 3:
+        print('Uso: python tabla_mmap.py ENTRADA.csv SALIDA.tbl')
+        print('     python tabla_mmap.py ver SALIDA.tbl [N]')
+        sys.exit(1)
+    inp, out = Path(sys.argv[1]), Path(sys.argv[2])
+    out.parent.mkdir(parents=True, exist_ok=True)
+    n = csv_a_tabla(inp, out)
+    print(f"OK: {n} filas → {out} ({out.stat().st_size} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# verificar_cabeceras.py
+# Comprueba que cabecera() de extraer_diccionario_dual.py clasifica igual que la versión
+# anterior (is_header_line + extract_headword con norm/split/regex por línea), y mide ambas.
+# Uso: python verificar_cabeceras.py [diccionario_shi_es.csv diccionario_es_shi.csv ...]
+#
+# Líneas probadas, normalizadas como las entrega lines_in_reading_order():
+#   - cada entry_text de los CSV completo y cortado en líneas de 35/50/70 caracteres,
+#   - cada headword, y casos borde escritos a mano.
+# Además informa cuántas filas de cada CSV vuelven a detectarse como cabecera con el mismo headword.
+# Sale con código 1 ante cualquier diferencia.
+
+import sys, re, csv, time, textwrap
+import extraer_diccionario_dual as dual
+
+CASOS = [
+    "", "*", "* *", "s.", "a'cha s.", "*a'cha prt. partícula", "** a'cha, s.", "(a'cha) s.",
+    "'a'cha s.", "-tek nom.", "¿a'cha? prt.", "a'cha", "kuku'yu'-wanan s. árbol",
+    "x" * 39 + "' s.", "x" * 40 + "' s.", "a'" + "x" * 200 + " s.", "a'cha " + "x " * 70 + "s.",
+    "ahumadero chinala s. barbacoa", "ahora sí ipa'laka adv. ahora", "bien-estar vi. algo",
+    "bien-" + "e" * 40 + " s.", "árbol grande s.", "Árbol s.", "ca'be s.", "ca-be s.x", "abc S. def",
+    "a'cha vb", "a'cha vbx.", "a'cha;s.", "a'cha:s.", "niño s. ", "ñandú adj.", "über s.",
+]
+
+def is_header_line_antes(line: str, mode: str) -> bool:
+    line_n = dual.norm(line)
+    if not dual.TAG_RE.search(line_n[:120]):
+        return False
+    if mode == "shi":
+        first = re.split(r"[\s,;:()]+", line_n.lstrip("* ").strip(), 1)[0]
+        return dual.looks_shiwilu_token(first)
+    else:
+        return dual.looks_spanish_head(line_n)
+
+def antes(ln: str, mode: str):
+    return dual.extract_headword(ln) if is_header_line_antes(ln, mode) else None
+
+def lineas_de_prueba(rutas):
+    vistas = {}
+    def agregar(s):
+        s = dual.norm(s)
+        vistas[s] = None
+    for c in CASOS: agregar(c)
+    filas = {}
+    for ruta in rutas:
+        with open(ruta, "r", encoding="utf-8", newline="") as f:
+            filas[ruta] = list(csv.DictReader(f))
+        for r in filas[ruta]:
+            agregar(r["headword"]); agregar(r["entry_text"])
+            for ancho in (35, 50, 70):
+                for ln in textwrap.wrap(r["entry_text"], ancho):
+                    agregar(ln)
+    return list(vistas), filas
+
+def main():
+    rutas = sys.argv[1:] or ["diccionario_shi_es.csv", "diccionario_es_shi.csv", "diccionario_utf8.csv"]
+    lineas, filas = lineas_de_prueba(rutas)
+    errores = 0
+    for mode in ("shi", "es"):
+        ref = [antes(ln, mode) for ln in lineas]
+        nuevo = [dual.cabecera(ln, mode) for ln in lineas]
+        malas = [(ln, a, b) for ln, a, b in zip(lineas, ref, nuevo) if a != b]
+        errores += len(malas)
+        for ln, a, b in malas[:10]:
+            print(f"  DIFERENCIA [{mode}] {ln[:80]!r}: antes={a!r} ahora={b!r}")
+
+        t0 = time.perf_counter()
+        for ln in lineas: antes(ln, mode)
+        t1 = time.perf_counter()
+        for ln in lineas: dual.cabecera(ln, mode)
+        t2 = time.perf_counter()
+        n_cab = sum(r is not None for r in ref)
+        print(f"[{mode}] {len(lineas)} líneas, {n_cab} cabeceras, {len(malas)} diferencias | "
+              f"antes {(t1-t0)/len(lineas)*1e6:.2f} µs/línea, ahora {(t2-t1)/len(lineas)*1e6:.2f} µs/línea "
+              f"(x{(t1-t0)/(t2-t1):.1f})")
+
+    for ruta, rows in filas.items():
+        modos = {r.get("mode") or "shi" for r in rows}
+        for mode in sorted(modos):
+            sub = [r for r in rows if (r.get("mode") or "shi") == mode]
+            textos = [(dual.norm(r["entry_text"]), dual.norm(r["headword"])) for r in sub]
+            n_antes = sum(antes(t, mode) == h for t, h in textos)
+            n_ahora = sum(dual.cabecera(t, mode) == h for t, h in textos)
+            print(f"  {ruta} [{mode}]: filas re-detectadas con el mismo headword: "
+                  f"antes {n_antes}/{len(sub)}, ahora {n_ahora}/{len(sub)}")
+
+    if errores:
+        print(f"ERROR: {errores} líneas clasificadas distinto")
+        sys.exit(1)
+    print("OK: misma clasificación y mismo headword en todas las líneas")
+
+if __name__ == "__main__":
+    main()